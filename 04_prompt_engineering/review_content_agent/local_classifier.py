@@ -0,0 +1,123 @@
+import argparse
+import json
+import os
+from typing import Tuple
+
+import joblib
+from sklearn.feature_extraction.text import CountVectorizer
+from sklearn.naive_bayes import MultinomialNB
+from sklearn.pipeline import make_pipeline
+
+
+class LocalReviewClassifier:
+    """
+    Fast local text classifier used in front of the LLM reviewer.
+
+    Same CountVectorizer + MultinomialNB approach as
+    01_core_ai_ml/simple_classifier_demo.py, trained on verdicts the LLM
+    already produced. Predictions come with a confidence (the class
+    probability) so the agent can decide which items to escalate.
+    """
+
+    def __init__(self, model_path: str = None):
+        """
+        Initialize the classifier.
+
+        Args:
+            model_path: File to load a trained model from (and save it to); loaded if it exists
+        """
+        self.model_path = model_path
+        self.pipeline = None
+
+        if model_path and os.path.exists(model_path):
+            self.load(model_path)
+
+    @property
+    def is_trained(self) -> bool:
+        return self.pipeline is not None
+
+    def train(self, texts: list[str], categories: list[str]):
+        """Fit a fresh model on labelled texts."""
+        if len(set(categories)) < 2:
+            raise ValueError("Need examples of at least two categories to train")
+
+        self.pipeline = make_pipeline(
+            CountVectorizer(lowercase=True, ngram_range=(1, 2), min_df=1),
+            MultinomialNB()
+        )
+        self.pipeline.fit(texts, categories)
+
+    def predict(self, text: str) -> Tuple[str, float]:
+        """
+        Classify a single text.
+
+        Returns:
+            Tuple of (category, confidence between 0 and 1)
+        """
+        return self.predict_many([text])[0]
+
+    def predict_many(self, texts: list[str]) -> list[Tuple[str, float]]:
+        """Classify several texts in one vectorized call."""
+        if not self.is_trained:
+            raise ValueError("Local classifier has not been trained")
+
+        probabilities = self.pipeline.predict_proba(texts)
+        classes = self.pipeline.classes_
+        return [(str(classes[row.argmax()]), float(row.max())) for row in probabilities]
+
+    def save(self, path: str = None):
+        path = path or self.model_path
+        if not path:
+            raise ValueError("No path given to save the local classifier to")
+        joblib.dump(self.pipeline, path)
+
+    def load(self, path: str = None):
+        self.pipeline = joblib.load(path or self.model_path)
+
+
+def load_labelled_jsonl(path: str, text_field: str = "content") -> Tuple[list[str], list[str]]:
+    """
+    Read LLM-labelled examples from a JSONL file.
+
+    Each line needs the text (text_field) and a "category". ERROR verdicts and
+    verdicts made by the local classifier itself are skipped, so the model is
+    only ever trained on LLM labels.
+    """
+    texts, categories = [], []
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if record.get("category") in (None, "ERROR") or record.get("decided_by") == "local_classifier":
+                continue
+            if record.get(text_field):
+                texts.append(record[text_field])
+                categories.append(record["category"])
+    return texts, categories
+
+
+def main():
+    """Retrain the local classifier from LLM-labelled JSONL files."""
+    parser = argparse.ArgumentParser(description="Train the local review classifier from LLM verdicts")
+    parser.add_argument("labels", nargs="+", help="JSONL files with content and category fields")
+    parser.add_argument("--model", default="review_classifier.joblib", help="Where to save the model")
+    parser.add_argument("--text-field", default="content", help="Field holding the text")
+    args = parser.parse_args()
+
+    texts, categories = [], []
+    for path in args.labels:
+        file_texts, file_categories = load_labelled_jsonl(path, text_field=args.text_field)
+        texts.extend(file_texts)
+        categories.extend(file_categories)
+
+    classifier = LocalReviewClassifier()
+    classifier.train(texts, categories)
+    classifier.save(args.model)
+
+    counts = {category: categories.count(category) for category in sorted(set(categories))}
+    print(f"Trained on {len(texts)} examples {counts}, saved to {args.model}")
+
+
+if __name__ == "__main__":
+    main()
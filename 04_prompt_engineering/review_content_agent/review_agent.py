@@ -1,7 +1,26 @@
+import argparse
+import hashlib
 import json
 import os
-from typing import Dict, Any
-from openai import OpenAI
+import random
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ALL_COMPLETED, FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Dict, Any, Callable, Iterator, Optional, Tuple
+from openai import OpenAI, APIConnectionError, APIStatusError, RateLimitError
+
+try:
+    from common.client_provider import get_default_provider
+except ImportError:
+    # common/ not installed (`pip install -e .` at the repo root): use the checkout
+    sys.path.append(str(Path(__file__).resolve().parents[2]))
+    from common.client_provider import get_default_provider
+
+from local_classifier import LocalReviewClassifier
+from verdict_cache import VerdictCache
 
 
 # System prompt with role definition and Chain of Thought instructions
@@ -39,33 +58,229 @@ Think through your analysis step by step, then provide your final classification
 }}"""
 
 
+# Packed mode: one request classifies many short items, so the instructions are sent once per pack
+PACKED_SYSTEM_PROMPT = """You are an expert content review classifier.
+
+Classify every item you are given into exactly one category:
+- SPAM: Unsolicited promotional content, repetitive messages, or irrelevant advertisements
+- LQ (Low Quality): Poor grammar, incoherent text, minimal value, or off-topic content
+- SAFE: High-quality, appropriate content that meets standards
+- REVIEW_NEEDED: Borderline cases requiring human review (ambiguous intent, sensitive topics)
+
+Judge each item independently. Return ONLY valid JSON."""
+
+
+PACKED_USER_PROMPT_TEMPLATE = """Classify each of these items. Each item has an "id" and its "content":
+
+{items_json}
+
+Return exactly one result per item id, in this exact JSON format:
+{{
+  "results": [
+    {{"id": 0, "category": "SPAM | LQ | SAFE | REVIEW_NEEDED", "explanation": "One-sentence reason"}}
+  ]
+}}"""
+
+
+# Label-only mode: a compact prompt that asks for nothing but the category
+LABEL_SYSTEM_PROMPT = """You are an expert content review classifier.
+
+Categories:
+- SPAM: Unsolicited promotional content, repetitive messages, or irrelevant advertisements
+- LQ (Low Quality): Poor grammar, incoherent text, minimal value, or off-topic content
+- SAFE: High-quality, appropriate content that meets standards
+- REVIEW_NEEDED: Borderline cases requiring human review (ambiguous intent, sensitive topics)
+
+Return ONLY valid JSON in the format {"category": "SPAM | LQ | SAFE | REVIEW_NEEDED"}."""
+
+
+LABEL_USER_PROMPT_TEMPLATE = """Content:
+\"\"\"
+{content}
+\"\"\""""
+
+
+# Follow-up call that explains a category that was already decided
+EXPLAIN_USER_PROMPT_TEMPLATE = """This content was classified as {category}:
+
+Content:
+\"\"\"
+{content}
+\"\"\"
+
+Explain the key indicators that support this classification, in this exact JSON format:
+{{
+  "explanation": "Your reasoning explaining why the content is {category}"
+}}"""
+
+
+VALID_CATEGORIES = ["SPAM", "LQ", "SAFE", "REVIEW_NEEDED"]
+
+EXPLAIN_POLICIES = ["always", "never", "flagged"]
+
+# Finds the category in a partial JSON response; the prompts ask for "category" before "explanation"
+CATEGORY_PATTERN = re.compile(r'"category"\s*:\s*"([^"]*)"')
+
+
+# Changes whenever a prompt changes, so cached verdicts from old prompts are not reused
+PROMPT_VERSION = hashlib.sha256(
+    "\n".join([SYSTEM_PROMPT, USER_PROMPT_TEMPLATE, PACKED_SYSTEM_PROMPT, PACKED_USER_PROMPT_TEMPLATE,
+               LABEL_SYSTEM_PROMPT, LABEL_USER_PROMPT_TEMPLATE, EXPLAIN_USER_PROMPT_TEMPLATE]).encode("utf-8")
+).hexdigest()[:12]
+
+
+class AdaptiveConcurrencyLimit:
+    """
+    Limits how many API calls are in flight, adapting to rate limiting.
+
+    Starts at max_limit. Every throttled (429) or overloaded (5xx) response
+    halves the limit, and each run of `limit` successful calls raises it by
+    one again (AIMD), so the agent settles just under whatever rate the API
+    quota (or capacity) allows.
+    """
+    
+    def __init__(self, max_limit: int):
+        self.max_limit = max(1, max_limit)
+        self.limit = self.max_limit
+        self.in_flight = 0
+        self._successes = 0
+        self._condition = threading.Condition()
+    
+    def acquire(self):
+        with self._condition:
+            while self.in_flight >= self.limit:
+                self._condition.wait()
+            self.in_flight += 1
+    
+    def release(self, throttled: bool = False):
+        with self._condition:
+            self.in_flight -= 1
+            if throttled:
+                self.limit = max(1, self.limit // 2)
+                self._successes = 0
+            else:
+                self._successes += 1
+                if self._successes >= self.limit and self.limit < self.max_limit:
+                    self.limit += 1
+                    self._successes = 0
+            self._condition.notify_all()
+
+
 class ContentReviewAgent:
     """Agent for classifying and reviewing text content."""
     
-    def __init__(self, api_key: str = None, model: str = "gpt-4o-mini"):
+    def __init__(self, api_key: str = None, model: str = "gpt-4o-mini", client: OpenAI = None,
+                 max_workers: int = 8, max_retries: int = 5, max_backoff: float = 30.0,
+                 local_classifier: LocalReviewClassifier = None, cascade_threshold: float = 0.95,
+                 cascade_categories: tuple = ("SPAM", "SAFE"), audit_rate: float = 0.0,
+                 label_log_path: str = None, verdict_cache: VerdictCache = None,
+                 explain_policy: str = "always", flagged_categories: tuple = ("SPAM", "REVIEW_NEEDED")):
         """
         Initialize the content review agent.
         
         Args:
             api_key: OpenAI API key (defaults to OPENAI_API_KEY env var)
             model: OpenAI model to use
+            client: OpenAI client to use (defaults to the shared, pooled client for api_key)
+            max_workers: Maximum number of concurrent API calls in review_batch
+            max_retries: Retries for rate-limited (429), server (5xx) and connection errors
+            max_backoff: Upper bound in seconds for a single retry delay
+            local_classifier: Trained LocalReviewClassifier to try before the LLM (cascade mode)
+            cascade_threshold: Minimum local confidence to skip the LLM
+            cascade_categories: Categories the local classifier may decide on its own
+            audit_rate: Fraction of confident local decisions also sent to the LLM to measure agreement
+            label_log_path: JSONL file every LLM verdict is appended to, for retraining the local model
+            verdict_cache: VerdictCache for LLM verdicts, so repeated content is only reviewed once
+            explain_policy: When review_content asks for an explanation: "always" (one
+                Chain of Thought call), "never" (compact label-only call) or "flagged"
+                (label-only call, plus an explanation call for flagged_categories)
+            flagged_categories: Categories that get an explanation under the "flagged" policy
         """
+        if explain_policy not in EXPLAIN_POLICIES:
+            raise ValueError(f"explain_policy must be one of {EXPLAIN_POLICIES}")
+        
         self.api_key = api_key or os.getenv("OPENAI_API_KEY")
-        if not self.api_key:
+        if client is None and not self.api_key:
             raise ValueError("OpenAI API key must be provided or set in OPENAI_API_KEY environment variable")
         
-        self.client = OpenAI(api_key=self.api_key)
+        self.client = client or get_default_provider().openai(self.api_key)
         self.model = model
+        self.max_workers = max(1, max_workers)
+        self.max_retries = max_retries
+        self.max_backoff = max_backoff
+        self.concurrency = AdaptiveConcurrencyLimit(self.max_workers)
+        
+        self.local_classifier = local_classifier
+        self.cascade_threshold = cascade_threshold
+        self.cascade_categories = tuple(cascade_categories)
+        self.audit_rate = audit_rate
+        self.label_log_path = label_log_path
+        self.verdict_cache = verdict_cache
+        self.explain_policy = explain_policy
+        self.flagged_categories = tuple(flagged_categories)
+        self.cache_namespace = f"{model}|{PROMPT_VERSION}|{explain_policy}"
+        self._stats_lock = threading.Lock()
+        self._cascade_counts = {
+            "local_decisions": 0,     # Decided locally, no API call
+            "escalations": 0,         # Local model unsure, sent to the LLM
+            "audits": 0,              # Confident local decisions double-checked by the LLM
+            "audit_agreements": 0,
+            "escalation_agreements": 0,
+        }
+    
+    def _create_completion(self, **kwargs):
+        """
+        Call the chat completions API, retrying transient failures.
+        
+        429s, 5xx responses and connection errors are retried with exponential
+        backoff and full jitter (or the server's Retry-After, if sent). Every
+        call goes through the adaptive concurrency limit, which shrinks when
+        the API starts throttling us (429) or is overloaded (5xx).
+        """
+        # We do our own retries, so turn off the client's built-in ones
+        client = self.client.with_options(max_retries=0)
+        
+        for attempt in range(self.max_retries + 1):
+            self.concurrency.acquire()
+            throttled = False
+            try:
+                return client.chat.completions.create(**kwargs)
+            except (APIStatusError, APIConnectionError) as e:
+                status = getattr(e, 'status_code', None)
+                throttled = isinstance(e, RateLimitError) or (status is not None and status >= 500)
+                retryable = throttled or status is None
+                if not retryable or attempt == self.max_retries:
+                    raise
+                delay = self._retry_delay(e, attempt)
+            finally:
+                self.concurrency.release(throttled=throttled)
+            
+            time.sleep(delay)
+    
+    def _retry_delay(self, error: Exception, attempt: int) -> float:
+        """Seconds to wait before the next attempt."""
+        response = getattr(error, 'response', None)
+        retry_after = response.headers.get('retry-after') if response is not None else None
+        try:
+            return min(float(retry_after), self.max_backoff)
+        except (TypeError, ValueError):
+            return random.uniform(0, min(self.max_backoff, 0.5 * 2 ** attempt))
     
     def review_content(self, content: str) -> Dict[str, Any]:
         """
         Review and classify the given content.
         
+        Cached verdicts for the same (normalized) content are returned first.
+        With a local classifier configured, confident SPAM/SAFE decisions are
+        returned without calling the API (marked with "decided_by":
+        "local_classifier"); everything else goes to the LLM.
+        
         Args:
             content: Text content to review
             
         Returns:
-            Dictionary with 'category' and 'explanation' keys
+            Dictionary with 'category' and 'explanation' keys ('explanation' is None
+            when the explain policy skips it)
             
         Raises:
             ValueError: If content is empty or invalid
@@ -74,12 +289,30 @@ class ContentReviewAgent:
         if not content or not content.strip():
             raise ValueError("Content cannot be empty")
         
+        if self.verdict_cache:
+            cached = self.verdict_cache.get(content, self.cache_namespace)
+            if cached:
+                return cached
+        
+        local_result, local_guess = self._local_verdict(content)
+        if local_result:
+            return local_result
+        
+        result = self._review_with_llm(content)
+        self._record_llm_verdict(content, local_guess, result, store=self._is_complete(result))
+        return result
+    
+    def _review_with_llm(self, content: str) -> Dict[str, Any]:
+        """Classify one item with the LLM, following the explain policy."""
+        if self.explain_policy != "always":
+            return self._label_with_llm(content)
+        
         try:
             # Create the user prompt with the content
             user_prompt = USER_PROMPT_TEMPLATE.format(content=content)
             
             # Call OpenAI API with role-based prompting
-            response = self.client.chat.completions.create(
+            response = self._create_completion(
                 model=self.model,
                 messages=[
                     {"role": "system", "content": SYSTEM_PROMPT},
@@ -91,49 +324,593 @@ class ContentReviewAgent:
             
             # Extract and parse the response
             result_text = response.choices[0].message.content
-            result = json.loads(result_text)
+            return self._parse_verdict(result_text)
             
-            # Validate the response structure
-            if "category" not in result or "explanation" not in result:
-                raise ValueError("Invalid response format: missing required fields")
+        except json.JSONDecodeError as e:
+            raise Exception(f"Failed to parse JSON response: {e}")
+        except Exception as e:
+            raise Exception(f"Error during content review: {e}")
+    
+    def _label_with_llm(self, content: str, explain: bool = True) -> Dict[str, Any]:
+        """
+        Classify with the compact label-only prompt, then explain if the policy asks for it.
+        
+        Unexplained results have 'explanation' set to None. explain=False
+        skips the explanation step whatever the policy.
+        """
+        try:
+            response = self._create_completion(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": LABEL_SYSTEM_PROMPT},
+                    {"role": "user", "content": LABEL_USER_PROMPT_TEMPLATE.format(content=content)}
+                ],
+                temperature=0.3,
+                max_tokens=20,  # {"category": "REVIEW_NEEDED"} is about 10 tokens
+                response_format={"type": "json_object"}
+            )
+            category = json.loads(response.choices[0].message.content).get("category")
+            if category not in VALID_CATEGORIES:
+                raise ValueError(f"Invalid category: {category}")
+        except json.JSONDecodeError as e:
+            raise Exception(f"Failed to parse JSON response: {e}")
+        except Exception as e:
+            raise Exception(f"Error during content review: {e}")
+        
+        result = {"category": category, "explanation": None}
+        if explain and self._needs_explanation(category):
+            result["explanation"] = self.explain(content, category)
+        return result
+    
+    def _needs_explanation(self, category: str) -> bool:
+        """Whether the "flagged" policy asks for an explanation of this category."""
+        return self.explain_policy == "flagged" and category in self.flagged_categories
+    
+    def _is_complete(self, result: Dict[str, Any]) -> bool:
+        """False if the explanation the policy asks for failed (so the verdict isn't stored)."""
+        return result["explanation"] is not None or not self._needs_explanation(result["category"])
+    
+    def explain(self, content: str, category: str) -> Optional[str]:
+        """
+        Explain why content belongs to an already decided category.
+        
+        Returns:
+            The explanation, or None if the call fails
+        """
+        try:
+            response = self._create_completion(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": SYSTEM_PROMPT},
+                    {"role": "user", "content": EXPLAIN_USER_PROMPT_TEMPLATE.format(content=content, category=category)}
+                ],
+                temperature=0.3,
+                response_format={"type": "json_object"}
+            )
+            return str(json.loads(response.choices[0].message.content)["explanation"])
+        except Exception as e:
+            print(f"Explanation failed: {e}")
+            return None
+    
+    @staticmethod
+    def _parse_verdict(result_text: str) -> Dict[str, Any]:
+        """Parse and validate a single-item JSON response."""
+        result = json.loads(result_text)
+        
+        # Validate the response structure
+        if "category" not in result or "explanation" not in result:
+            raise ValueError("Invalid response format: missing required fields")
+        
+        # Validate category
+        if result["category"] not in VALID_CATEGORIES:
+            raise ValueError(f"Invalid category: {result['category']}")
+        
+        return result
+    
+    def review_content_streaming(self, content: str,
+                                 on_explanation: Callable[[Dict[str, Any]], None] = None) -> Dict[str, Any]:
+        """
+        Review content and return as soon as the category has been generated.
+        
+        Under the "always" policy the Chain of Thought response is streamed
+        and parsed incrementally; the category is validated and returned the
+        moment it is complete, without waiting for the explanation. Under
+        "never" and "flagged" the compact label-only call already returns
+        just the category.
+        
+        Without on_explanation no explanation is generated (the stream is
+        closed early). With on_explanation, the explanation the policy asks
+        for is finished on a background thread and the full result is passed
+        to the callback. Either way the verdict is cached, logged and counted
+        in the cascade stats like any other LLM verdict, once.
+        
+        Cached verdicts and confident local decisions are returned right away,
+        and the callback is called immediately with the same result.
+        
+        Args:
+            content: Text content to review
+            on_explanation: Called with the full result dictionary once the explanation is done
             
-            # Validate category
-            valid_categories = ["SPAM", "LQ", "SAFE", "REVIEW_NEEDED"]
-            if result["category"] not in valid_categories:
-                raise ValueError(f"Invalid category: {result['category']}")
+        Returns:
+            Dictionary with 'category' and 'explanation' keys ('explanation' is None
+            if it was not generated yet)
             
+        Raises:
+            ValueError: If content is empty or the category is invalid
+            Exception: If the API call fails or no category is found in the response
+        """
+        if not content or not content.strip():
+            raise ValueError("Content cannot be empty")
+        
+        result = self.verdict_cache.get(content, self.cache_namespace) if self.verdict_cache else None
+        local_guess = None
+        if not result:
+            result, local_guess = self._local_verdict(content)
+        if result:
+            if on_explanation:
+                on_explanation(dict(result))
             return result
-            
-        except json.JSONDecodeError as e:
-            raise Exception(f"Failed to parse JSON response: {e}")
+        
+        close_stream = None
+        if self.explain_policy == "always":
+            category, finish_explanation, close_stream = self._stream_category(content)
+        else:
+            category = self._label_with_llm(content, explain=False)["category"]
+            finish_explanation = None
+            if self._needs_explanation(category):
+                def finish_explanation():
+                    return {"category": category, "explanation": self.explain(content, category)}
+        
+        result = {"category": category, "explanation": None}
+        if not on_explanation or finish_explanation is None:
+            if close_stream is not None:
+                close_stream()  # Stop generating; we only needed the category
+            self._record_llm_verdict(content, local_guess, result)
+            if on_explanation:
+                on_explanation(dict(result))
+            return result
+        
+        def finish():
+            try:
+                full_result = finish_explanation()
+                complete = full_result["explanation"] is not None
+            except Exception as e:
+                print(f"Explanation failed, keeping the category only: {e}")
+                full_result = dict(result)
+                complete = False
+            self._record_llm_verdict(content, local_guess, full_result, store=complete)
+            on_explanation(full_result)
+        
+        threading.Thread(target=finish, daemon=True).start()
+        return dict(result)
+    
+    def _stream_category(self, content: str):
+        """
+        Stream the Chain of Thought response until its category is complete.
+        
+        Returns:
+            Tuple of (category, rest, close): rest() reads the remaining
+            response and returns the full verdict, close() stops the stream
+        """
+        try:
+            stream = self._create_completion(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": SYSTEM_PROMPT},
+                    {"role": "user", "content": USER_PROMPT_TEMPLATE.format(content=content)}
+                ],
+                temperature=0.3,
+                response_format={"type": "json_object"},
+                stream=True
+            )
         except Exception as e:
             raise Exception(f"Error during content review: {e}")
+        
+        chunks = iter(stream)
+        text = ""
+        category = None
+        for chunk in chunks:
+            if chunk.choices and chunk.choices[0].delta.content:
+                text += chunk.choices[0].delta.content
+                match = CATEGORY_PATTERN.search(text)
+                if match:
+                    category = match.group(1)
+                    break
+        
+        if category not in VALID_CATEGORIES:
+            stream.close()
+            if category is None:
+                raise Exception("Error during content review: no category in response")
+            raise ValueError(f"Invalid category: {category}")
+        
+        def rest():
+            nonlocal text
+            for chunk in chunks:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    text += chunk.choices[0].delta.content
+            return self._parse_verdict(text)
+        
+        return category, rest, stream.close
+    
+    def _local_verdict(self, content: str) -> Tuple[Optional[Dict[str, Any]], Optional[Tuple[str, float]]]:
+        """
+        Try the local classifier first.
+        
+        Returns:
+            Tuple of (result if decided locally else None, local (category, confidence) guess or None)
+        """
+        if not self.local_classifier or not self.local_classifier.is_trained:
+            return None, None
+        
+        category, confidence = self.local_classifier.predict(content)
+        guess = (category, confidence)
+        confident = category in self.cascade_categories and confidence >= self.cascade_threshold
+        
+        if not confident:
+            return None, guess
+        if self.audit_rate and random.random() < self.audit_rate:
+            return None, guess
+        
+        with self._stats_lock:
+            self._cascade_counts["local_decisions"] += 1
+        return {
+            "category": category,
+            "explanation": f"Decided by the local classifier with {confidence:.0%} confidence",
+            "decided_by": "local_classifier",
+        }, guess
+    
+    def _record_llm_verdict(self, content: str, local_guess: Optional[Tuple[str, float]], result: Dict[str, Any],
+                            store: bool = True):
+        """
+        Update cascade stats for an LLM verdict, cache it and log it as a training label.
+        
+        With store=False (e.g. the explanation failed) only the stats are updated.
+        """
+        if store and self.verdict_cache:
+            self.verdict_cache.set(content, self.cache_namespace, result)
+        
+        if local_guess:
+            category, confidence = local_guess
+            audited = category in self.cascade_categories and confidence >= self.cascade_threshold
+            kind = "audit" if audited else "escalation"
+            with self._stats_lock:
+                self._cascade_counts[f"{kind}s"] += 1
+                if category == result["category"]:
+                    self._cascade_counts[f"{kind}_agreements"] += 1
+        
+        if store and self.label_log_path:
+            line = json.dumps({"content": content, "category": result["category"],
+                               "explanation": result["explanation"]}, ensure_ascii=False)
+            with self._stats_lock, open(self.label_log_path, "a") as f:
+                f.write(line + "\n")
+    
+    def cascade_stats(self) -> Dict[str, Any]:
+        """
+        Return how the local classifier is doing.
+        
+        escalation_rate is the share of items sent to the LLM because the local
+        model was unsure. audit_agreement is how often the LLM agreed with
+        confident local decisions; escalation_agreement is the same for the
+        unsure ones, which helps tune cascade_threshold.
+        """
+        with self._stats_lock:
+            counts = dict(self._cascade_counts)
+        
+        total = counts["local_decisions"] + counts["escalations"] + counts["audits"]
+        return {
+            **counts,
+            "total": total,
+            "escalation_rate": counts["escalations"] / total if total else 0.0,
+            "audit_agreement": counts["audit_agreements"] / counts["audits"] if counts["audits"] else None,
+            "escalation_agreement": (counts["escalation_agreements"] / counts["escalations"]
+                                     if counts["escalations"] else None),
+        }
     
-    def review_batch(self, contents: list[str]) -> list[Dict[str, Any]]:
+    def _review_pack(self, items: list[tuple[int, str]]) -> Dict[int, Dict[str, Any]]:
         """
-        Review multiple pieces of content.
+        Classify several items in a single API call.
+        
+        Every returned element is validated. Items missing from the response
+        or with an invalid result are split into two halves and retried; a
+        single leftover item falls back to the single-item prompt.
         
         Args:
-            contents: List of text contents to review
+            items: (id, content) pairs
             
         Returns:
-            List of dictionaries with review results
+            Mapping of id to result dictionary (ERROR results for hard failures)
         """
-        results = []
-        for content in contents:
+        if len(items) == 1:
+            item_id, content = items[0]
             try:
-                result = self.review_content(content)
-                results.append(result)
+                return {item_id: self._review_with_llm(content)}
             except Exception as e:
-                results.append({
-                    "category": "ERROR",
-                    "explanation": f"Failed to process: {str(e)}"
-                })
+                return {item_id: {"category": "ERROR", "explanation": f"Failed to process: {str(e)}"}}
+        
+        results = {}
+        try:
+            items_json = json.dumps([{"id": item_id, "content": content} for item_id, content in items],
+                                    ensure_ascii=False, indent=1)
+            response = self._create_completion(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": PACKED_SYSTEM_PROMPT},
+                    {"role": "user", "content": PACKED_USER_PROMPT_TEMPLATE.format(items_json=items_json)}
+                ],
+                temperature=0.3,
+                response_format={"type": "json_object"}
+            )
+            
+            expected = {str(item_id): item_id for item_id, _ in items}
+            for element in json.loads(response.choices[0].message.content).get("results", []):
+                if not isinstance(element, dict):
+                    continue
+                item_id = expected.get(str(element.get("id")))
+                if (item_id is not None and element.get("category") in VALID_CATEGORIES
+                        and isinstance(element.get("explanation"), str)):
+                    results[item_id] = {"category": element["category"], "explanation": element["explanation"]}
+        except Exception as e:
+            print(f"Packed review of {len(items)} items failed, splitting: {e}")
+        
+        missing = [(item_id, content) for item_id, content in items if item_id not in results]
+        if missing:
+            middle = (len(missing) + 1) // 2
+            for half in (missing[:middle], missing[middle:]):
+                if half:
+                    results.update(self._review_pack(half))
+        
+        return results
+    
+    def review_packed(self, contents: list[str], pack_size: int = 20,
+                      max_workers: int = None) -> list[Dict[str, Any]]:
+        """
+        Review many short contents with several items per API call.
+        
+        Contents are grouped into packs of pack_size and each pack is
+        classified by one request, so the instructions are paid for once per
+        pack instead of once per item. Packs run concurrently. With a local
+        classifier configured, only the items it is unsure about are packed.
+        
+        Args:
+            contents: List of text contents to review
+            pack_size: Number of items classified per request
+            max_workers: Number of packs reviewed at once (defaults to the agent's max_workers)
+            
+        Returns:
+            List of dictionaries with review results, in the same order as contents
+        """
+        results = [None] * len(contents)
+        items = []
+        local_guesses = {}
+        for item_id, content in enumerate(contents):
+            if not content or not content.strip():
+                results[item_id] = {"category": "ERROR", "explanation": "Failed to process: Content cannot be empty"}
+                continue
+            if self.verdict_cache:
+                results[item_id] = self.verdict_cache.get(content, self.cache_namespace)
+                if results[item_id]:
+                    continue
+            local_result, local_guesses[item_id] = self._local_verdict(content)
+            if local_result:
+                results[item_id] = local_result
+            else:
+                items.append((item_id, content))
+        
+        packs = [items[i:i + pack_size] for i in range(0, len(items), pack_size)]
+        with ThreadPoolExecutor(max_workers=max_workers or self.max_workers) as executor:
+            for pack_results in executor.map(self._review_pack, packs):
+                for item_id, result in pack_results.items():
+                    results[item_id] = result
+                    if result["category"] != "ERROR":
+                        self._record_llm_verdict(contents[item_id], local_guesses[item_id], result)
+        
         return results
+    
+    def review_batch(self, contents: list[str], max_workers: int = None,
+                     pack_size: int = None) -> list[Dict[str, Any]]:
+        """
+        Review multiple pieces of content concurrently.
+        
+        Items are reviewed on a thread pool; the number of API calls in flight
+        is capped by max_workers and shrinks automatically while the API is
+        rate limiting. Transient failures are retried with jittered backoff.
+        With a verdict cache, identical (normalized) items in the batch are
+        reviewed once and share the verdict.
+        
+        Args:
+            contents: List of text contents to review
+            max_workers: Number of worker threads (defaults to the agent's max_workers)
+            pack_size: If set, classify this many items per request (see review_packed)
+            
+        Returns:
+            List of dictionaries with review results, in the same order as contents
+        """
+        if self.verdict_cache:
+            first_index = {}
+            positions = []
+            for content in contents:
+                key = self.verdict_cache.make_key(content, self.cache_namespace) if content else None
+                positions.append(first_index.setdefault(key, len(first_index)) if key else None)
+            
+            if len(first_index) < len(contents):
+                unique = [None] * len(first_index)
+                for content, position in zip(contents, positions):
+                    if position is not None:
+                        unique[position] = content
+                self.verdict_cache.record_duplicates(sum(p is not None for p in positions) - len(unique))
+                
+                unique_results = self._review_batch_items(unique, max_workers, pack_size)
+                empty = {"category": "ERROR", "explanation": "Failed to process: Content cannot be empty"}
+                return [dict(unique_results[p]) if p is not None else dict(empty) for p in positions]
+        
+        return self._review_batch_items(contents, max_workers, pack_size)
+    
+    def _review_batch_items(self, contents: list[str], max_workers: int = None,
+                            pack_size: int = None) -> list[Dict[str, Any]]:
+        if pack_size:
+            return self.review_packed(contents, pack_size=pack_size, max_workers=max_workers)
+        
+        with ThreadPoolExecutor(max_workers=max_workers or self.max_workers) as executor:
+            return list(executor.map(self._review_or_error, contents))
+    
+    def _review_or_error(self, content: str) -> Dict[str, Any]:
+        """review_content, but failures come back as an ERROR result instead of raising."""
+        try:
+            return self.review_content(content)
+        except Exception as e:
+            return {
+                "category": "ERROR",
+                "explanation": f"Failed to process: {str(e)}"
+            }
+    
+    def review_jsonl(self, input_path: str, output_path: str, id_field: str = "id",
+                     text_fields: tuple = ("content",), max_in_flight: int = None,
+                     progress_every: int = 100) -> Dict[str, Any]:
+        """
+        Review a JSONL file and append verdicts to another JSONL file.
+        
+        Input is read one line at a time and at most max_in_flight items are
+        being reviewed at once, so memory stays flat however big the input is.
+        Each verdict is written and flushed as soon as it completes, in
+        completion order. The output file is the checkpoint: on a rerun, IDs
+        that already have a verdict (other than ERROR) are skipped. A line
+        that isn't a JSON object gets an ERROR verdict under its line number
+        instead of stopping the run.
+        
+        Args:
+            input_path: JSONL file with one item per line
+            output_path: JSONL file verdicts are appended to ({id, category, explanation})
+            id_field: Field holding the item ID (the line number is used if missing)
+            text_fields: Fields joined with a blank line to form the content to review
+            max_in_flight: Items reviewed concurrently (defaults to twice the agent's max_workers)
+            progress_every: Print a progress line after this many verdicts
+            
+        Returns:
+            Dictionary with reviewed, skipped, errors, elapsed_seconds and items_per_second
+        """
+        done_ids = self._load_checkpoint(output_path)
+        max_in_flight = max_in_flight or 2 * self.max_workers
+        stats = {"reviewed": 0, "skipped": 0, "errors": 0}
+        start = time.time()
+        
+        def report():
+            elapsed = time.time() - start
+            rate = stats["reviewed"] / elapsed if elapsed else 0.0
+            print(f"Progress: {stats['reviewed']} reviewed, {stats['skipped']} skipped, "
+                  f"{stats['errors']} errors, {rate:.1f} items/s")
+        
+        with open(output_path, "a", encoding="utf-8") as out, \
+                ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            in_flight = {}
+            
+            def write(record):
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                out.flush()
+                stats["reviewed"] += 1
+                stats["errors"] += record["category"] == "ERROR"
+                if progress_every and stats["reviewed"] % progress_every == 0:
+                    report()
+            
+            def collect(return_when):
+                finished, _ = wait(in_flight, return_when=return_when)
+                for future in finished:
+                    item_id = in_flight.pop(future)
+                    write({"id": item_id, **future.result()})
+            
+            for item_id, content, error in self._read_jsonl_items(input_path, id_field, text_fields):
+                if item_id in done_ids:
+                    stats["skipped"] += 1
+                    continue
+                if error is not None:
+                    write({"id": item_id, "category": "ERROR", "explanation": error})
+                    continue
+                if len(in_flight) >= max_in_flight:
+                    collect(FIRST_COMPLETED)
+                in_flight[executor.submit(self._review_or_error, content)] = item_id
+            
+            if in_flight:
+                collect(ALL_COMPLETED)
+        
+        report()
+        elapsed = time.time() - start
+        stats["elapsed_seconds"] = elapsed
+        stats["items_per_second"] = stats["reviewed"] / elapsed if elapsed else 0.0
+        return stats
+    
+    @staticmethod
+    def _load_checkpoint(output_path: str) -> set:
+        """IDs that already have a non-ERROR verdict in output_path."""
+        done_ids = set()
+        if not os.path.exists(output_path):
+            return done_ids
+        
+        with open(output_path, "rb+") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Partial line from a crash
+                if record.get("category") != "ERROR":
+                    done_ids.add(record.get("id"))
+            
+            # Terminate a partial last line so new verdicts start on their own line
+            if f.tell():
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    f.write(b"\n")
+        return done_ids
+    
+    @staticmethod
+    def _read_jsonl_items(input_path: str, id_field: str,
+                          text_fields: tuple) -> Iterator[Tuple[Any, Optional[str], Optional[str]]]:
+        """
+        Yield (id, content, error) from a JSONL file, one line at a time.
+        
+        error is None for a valid line; a malformed one yields
+        (line number, None, error message).
+        """
+        with open(input_path, encoding="utf-8") as f:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield line_number, None, f"Malformed JSON on line {line_number}: {e}"
+                    continue
+                if not isinstance(record, dict):
+                    yield line_number, None, f"Line {line_number} is not a JSON object"
+                    continue
+                content = "\n\n".join(str(record[field]) for field in text_fields if record.get(field))
+                yield record.get(id_field, line_number), content, None
 
 
 def main():
-    """Example usage of the ContentReviewAgent."""
+    """Review a JSONL file from the command line, or run the demo without arguments."""
+    parser = argparse.ArgumentParser(description="Content Review Agent")
+    parser.add_argument("input", nargs="?", help="JSONL file to review (omit to run the demo)")
+    parser.add_argument("output", nargs="?", help="JSONL file verdicts are appended to")
+    parser.add_argument("--id-field", default="id", help="Field holding the item ID")
+    parser.add_argument("--text-fields", default="content",
+                        help="Comma-separated fields that make up the content, e.g. title,body")
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent API calls")
+    parser.add_argument("--cache-db", help="SQLite file for the verdict cache")
+    parser.add_argument("--local-model", help="Trained local classifier for cascade mode")
+    args = parser.parse_args()
+    
+    if args.input:
+        if not args.output:
+            parser.error("output is required when input is given")
+        agent = ContentReviewAgent(
+            max_workers=args.workers,
+            verdict_cache=VerdictCache(db_path=args.cache_db) if args.cache_db else None,
+            local_classifier=LocalReviewClassifier(args.local_model) if args.local_model else None,
+        )
+        stats = agent.review_jsonl(args.input, args.output, id_field=args.id_field,
+                                   text_fields=tuple(args.text_fields.split(",")))
+        print(f"Done: {stats['reviewed']} reviewed, {stats['skipped']} skipped, "
+              f"{stats['errors']} errors in {stats['elapsed_seconds']:.1f}s")
+        return
     
     # Initialize the agent
     agent = ContentReviewAgent()
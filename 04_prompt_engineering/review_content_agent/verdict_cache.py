@@ -0,0 +1,188 @@
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+
+URL_PATTERN = re.compile(r"(https?://|www\.)\S+", re.IGNORECASE)
+DIGITS_PATTERN = re.compile(r"\d+")
+
+
+class VerdictCache:
+    """
+    Cache of review verdicts keyed on a hash of the normalized content.
+
+    Spam waves repeat the same text with trivial changes, so content is
+    normalized before hashing (whitespace and case by default, URLs and digits
+    optionally). Keys also include a namespace (model + prompt version), so
+    changing either invalidates old verdicts.
+
+    Tier 1 is an in-memory LRU; tier 2 is an optional SQLite file that survives
+    restarts. Both tiers are size-bounded and all methods are thread-safe.
+    """
+
+    def __init__(self, max_entries: int = 10_000, db_path: str = None, max_db_entries: int = 1_000_000,
+                 lowercase: bool = True, collapse_whitespace: bool = True,
+                 normalize_urls: bool = False, normalize_digits: bool = False):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of verdicts kept in memory
+            db_path: Path to a SQLite file for the on-disk tier (None = memory only)
+            max_db_entries: Maximum number of verdicts kept on disk
+            lowercase: Ignore case differences
+            collapse_whitespace: Ignore differences in spacing and line breaks
+            normalize_urls: Treat all URLs as the same token
+            normalize_digits: Treat all numbers as the same token
+        """
+        self.max_entries = max_entries
+        self.max_db_entries = max_db_entries
+        self.lowercase = lowercase
+        self.collapse_whitespace = collapse_whitespace
+        self.normalize_urls = normalize_urls
+        self.normalize_digits = normalize_digits
+
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.batch_duplicates = 0
+
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS verdict_cache ("
+                "key TEXT PRIMARY KEY, verdict TEXT NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._db.commit()
+            # Row count kept in memory, so writes never need a COUNT(*) table scan
+            self._db_rows = self._db.execute("SELECT COUNT(*) FROM verdict_cache").fetchone()[0]
+
+    def normalize(self, content: str) -> str:
+        """Apply the configured normalizations to content."""
+        if self.normalize_urls:
+            content = URL_PATTERN.sub("<url>", content)
+        if self.normalize_digits:
+            content = DIGITS_PATTERN.sub("0", content)
+        if self.lowercase:
+            content = content.lower()
+        if self.collapse_whitespace:
+            content = " ".join(content.split())
+        return content
+
+    def make_key(self, content: str, namespace: str) -> str:
+        digest = hashlib.sha256(self.normalize(content).encode("utf-8")).hexdigest()
+        return f"{namespace}|{digest}"
+
+    def get(self, content: str, namespace: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached verdict.
+
+        Returns:
+            A copy of the cached verdict, or None on a miss
+        """
+        key = self.make_key(content, namespace)
+
+        with self._lock:
+            verdict = self._memory.get(key)
+            if verdict is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return dict(verdict)
+
+            if self._db is not None:
+                row = self._db.execute("SELECT verdict FROM verdict_cache WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    verdict = json.loads(row[0])
+                    self._db.execute("UPDATE verdict_cache SET accessed_at = ? WHERE key = ?", (time.time(), key))
+                    self._db.commit()
+                    self._remember(key, verdict)
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return dict(verdict)
+
+            self.misses += 1
+            return None
+
+    def set(self, content: str, namespace: str, verdict: Dict[str, Any]):
+        """Store a verdict for content under namespace."""
+        key = self.make_key(content, namespace)
+        verdict = dict(verdict)
+
+        with self._lock:
+            self._remember(key, verdict)
+
+            if self._db is not None:
+                exists = self._db.execute("SELECT 1 FROM verdict_cache WHERE key = ?", (key,)).fetchone()
+                self._db.execute(
+                    "INSERT OR REPLACE INTO verdict_cache (key, verdict, accessed_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(verdict), time.time())
+                )
+                if exists is None:
+                    self._db_rows += 1
+                if self._db_rows > self.max_db_entries:
+                    self._evict_disk()
+                self._db.commit()
+
+    def record_duplicates(self, count: int):
+        """Count batch items that were answered by another identical item in the same batch."""
+        with self._lock:
+            self.batch_duplicates += count
+
+    def _remember(self, key: str, verdict: Dict[str, Any]):
+        """Put a verdict in the memory tier, evicting the least recently used ones."""
+        self._memory[key] = verdict
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _evict_disk(self):
+        """
+        Drop the least recently used rows.
+
+        Runs only once the disk tier is over max_db_entries and shrinks it to
+        90% of that, so the sort is paid once per many writes, not on each.
+        """
+        target = int(self.max_db_entries * 0.9)
+        self._db_rows -= self._db.execute(
+            "DELETE FROM verdict_cache WHERE key IN ("
+            "SELECT key FROM verdict_cache ORDER BY accessed_at LIMIT ?)",
+            (self._db_rows - target,)
+        ).rowcount
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'disk_hits': self.disk_hits,
+                'batch_duplicates': self.batch_duplicates,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'memory_entries': len(self._memory),
+            }
+
+    def clear(self):
+        """Remove every verdict from both tiers and reset the counters."""
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM verdict_cache")
+                self._db.commit()
+                self._db_rows = 0
+            self.hits = self.misses = self.disk_hits = self.batch_duplicates = 0
+
+    def close(self):
+        """Close the SQLite connection."""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
@@ -0,0 +1,149 @@
+import copy
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+import faiss
+import numpy as np
+from sentence_transformers import SentenceTransformer
+
+
+class SemanticAnswerCache:
+    """
+    Cache of research results looked up by question meaning, not exact text.
+
+    Questions are embedded with a local SentenceTransformer (the same stack as
+    07_agent_memory) and stored in a FAISS inner-product index over normalized
+    vectors, so scores are cosine similarities. A lookup returns the stored
+    result of the most similar question if it is above the similarity
+    threshold and younger than max_age_seconds.
+
+    Entries are evicted oldest-first beyond max_entries, and the cache can be
+    saved to and loaded from disk. All methods are thread-safe.
+    """
+
+    def __init__(self, embedding_model_name: str = "all-MiniLM-L6-v2",
+                 similarity_threshold: float = 0.9, max_age_seconds: float = 24 * 3600,
+                 max_entries: int = 10_000, path: str = None):
+        """
+        Initialize the cache.
+
+        Args:
+            embedding_model_name: SentenceTransformer model used to embed questions
+            similarity_threshold: Minimum cosine similarity for a cache hit
+            max_age_seconds: Entries older than this are never served
+            max_entries: Maximum number of cached answers
+            path: File prefix to load from and save to (path.faiss + path.json)
+        """
+        self.model = SentenceTransformer(embedding_model_name)
+        self.similarity_threshold = similarity_threshold
+        self.max_age_seconds = max_age_seconds
+        self.max_entries = max_entries
+        self.path = path
+
+        dim = self.model.get_sentence_embedding_dimension()
+        self.index = faiss.IndexIDMap(faiss.IndexFlatIP(dim))
+        self.entries: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()  # Oldest first
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        if path and os.path.exists(f"{path}.json"):
+            self.load(path)
+
+    def _embed(self, question: str) -> np.ndarray:
+        embedding = self.model.encode([question], normalize_embeddings=True)
+        return np.asarray(embedding).astype("float32")
+
+    def lookup(self, question: str) -> Optional[Tuple[Dict[str, Any], float]]:
+        """
+        Find a stored result for this question or a paraphrase of it.
+
+        Returns:
+            Tuple of (copy of the stored result, similarity), or None on a miss
+        """
+        embedding = self._embed(question)
+        now = time.time()
+
+        with self._lock:
+            if self.index.ntotal:
+                scores, ids = self.index.search(embedding, min(5, self.index.ntotal))
+                expired = []
+                for score, entry_id in zip(scores[0], ids[0]):
+                    if entry_id == -1 or score < self.similarity_threshold:
+                        break
+                    entry = self.entries[int(entry_id)]
+                    if now - entry['created_at'] > self.max_age_seconds:
+                        expired.append(int(entry_id))
+                        continue
+                    self.hits += 1
+                    self._remove(expired)
+                    return copy.deepcopy(entry['result']), float(score)
+                self._remove(expired)
+
+            self.misses += 1
+            return None
+
+    def store(self, question: str, result: Dict[str, Any]):
+        """Cache a research result under its question."""
+        embedding = self._embed(question)
+
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            self.index.add_with_ids(embedding, np.array([entry_id], dtype="int64"))
+            self.entries[entry_id] = {
+                'question': question,
+                'result': copy.deepcopy(result),
+                'created_at': time.time(),
+            }
+
+            if len(self.entries) > self.max_entries:
+                self._remove(list(self.entries)[:len(self.entries) - self.max_entries])
+
+    def _remove(self, entry_ids):
+        if not entry_ids:
+            return
+        self.index.remove_ids(np.array(entry_ids, dtype="int64"))
+        for entry_id in entry_ids:
+            self.entries.pop(entry_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': len(self.entries),
+            }
+
+    def save(self, path: str = None):
+        """Write the index and entries to path.faiss and path.json."""
+        path = path or self.path
+        if not path:
+            raise ValueError("No path given to save the answer cache to")
+
+        with self._lock:
+            faiss.write_index(self.index, f"{path}.faiss")
+            with open(f"{path}.json", "w") as f:
+                json.dump({
+                    'next_id': self._next_id,
+                    'entries': [[entry_id, entry] for entry_id, entry in self.entries.items()],
+                }, f)
+
+    def load(self, path: str = None):
+        """Replace the cache contents with what was saved at path."""
+        path = path or self.path
+
+        with self._lock:
+            self.index = faiss.read_index(f"{path}.faiss")
+            with open(f"{path}.json") as f:
+                data = json.load(f)
+            self._next_id = data['next_id']
+            self.entries = OrderedDict((entry_id, entry) for entry_id, entry in data['entries'])
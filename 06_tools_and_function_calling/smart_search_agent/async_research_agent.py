@@ -0,0 +1,438 @@
+import asyncio
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Any, AsyncIterator, List
+from openai import AsyncOpenAI
+from duckduckgo_search import DDGS
+
+try:
+    from common.client_provider import get_default_provider
+except ImportError:
+    # common/ not installed (`pip install -e .` at the repo root): use the checkout
+    sys.path.append(str(Path(__file__).resolve().parents[2]))
+    from common.client_provider import get_default_provider
+
+from context_packer import pack_context
+from search_cache import SearchCache
+from source_dedup import dedup_sources
+from smart_research_agent import (
+    NO_RESULTS_ANSWER,
+    build_query_messages,
+    build_summary_messages,
+    parse_queries,
+    parse_search_result,
+)
+
+if TYPE_CHECKING:
+    from answer_cache import SemanticAnswerCache
+
+
+class AsyncSearchAdapter:
+    """
+    Non-blocking search adapter around the synchronous DuckDuckGo client.
+
+    DDGS has no native asyncio API, so searches run on one small, shared
+    thread pool. The number of threads is fixed by max_workers no matter how
+    many research sessions are awaiting results, and the event loop never blocks.
+
+    Any object with an async `text(query, max_results)` method returning raw
+    DuckDuckGo-style dicts can be used in its place.
+    """
+
+    def __init__(self, search_client: DDGS = None, max_workers: int = 8, timeout: float = 10.0):
+        """
+        Initialize the search adapter.
+
+        Args:
+            search_client: Synchronous DDGS client (defaults to the shared one)
+            max_workers: Maximum number of searches running at the same time
+            timeout: Network timeout for the DDGS client
+        """
+        self.search_client = search_client or get_default_provider().search(timeout)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="search")
+
+    async def text(self, query: str, max_results: int = 5) -> List[Dict[str, Any]]:
+        """Run a text search without blocking the event loop."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor,
+            lambda: list(self.search_client.text(query, max_results=max_results) or [])
+        )
+
+    def close(self):
+        """Stop the worker threads (searches already running finish in the background)."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class AsyncSmartResearchAgent:
+    """
+    Asyncio version of SmartResearchAgent for hosting many research sessions in one event loop.
+
+    Uses AsyncOpenAI for both LLM steps and an AsyncSearchAdapter for web search, and
+    returns the same result dict as SmartResearchAgent.research(). Cancelling the
+    task that awaits research() cancels every search and LLM call it started.
+    """
+
+    def __init__(self, api_key: str = None, model: str = "gpt-4o-mini",
+                 max_concurrency: int = 4, search_timeout: float = 10.0,
+                 search_adapter: AsyncSearchAdapter = None, cache: SearchCache = None,
+                 dedup_threshold: float = 0.8, context_budget_tokens: int = 3000,
+                 speculative: bool = False, fast_path_max_words: int = 0,
+                 answer_cache: "SemanticAnswerCache" = None, client: AsyncOpenAI = None):
+        """
+        Initialize the async research agent.
+
+        Args:
+            api_key: OpenAI API key (defaults to OPENAI_API_KEY env var)
+            model: OpenAI model to use for query generation and summarization
+            max_concurrency: Maximum number of searches in flight per research call
+            search_timeout: Seconds to wait for a single search query before giving up
+            search_adapter: Shared async search adapter (one is created if omitted)
+            cache: Optional search result cache (can be shared between agents)
+            dedup_threshold: Body similarity above which sources are collapsed (None = no dedup)
+            context_budget_tokens: Approximate token budget for sources in the summary prompt (None = no limit)
+            speculative: Search the raw question while the LLM is still generating queries
+            fast_path_max_words: Questions this short skip query generation and are searched as-is (0 = never)
+            answer_cache: Optional semantic cache that answers paraphrased repeat questions
+            client: Shared AsyncOpenAI client, e.g. ClientProvider.async_openai() (one is created if omitted)
+        """
+        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
+        if client is None and not self.api_key:
+            raise ValueError("OpenAI API key must be provided or set in OPENAI_API_KEY environment variable")
+
+        # Async connections are tied to an event loop, so only share a client when asked to
+        self._owns_client = client is None
+        self.client = client or AsyncOpenAI(api_key=self.api_key)
+        self.model = model
+        self.max_concurrency = max(1, max_concurrency)
+        self.search_timeout = search_timeout
+        self._owns_search_adapter = search_adapter is None
+        self.search_adapter = search_adapter or AsyncSearchAdapter(timeout=search_timeout)
+        self.cache = cache
+        self.dedup_threshold = dedup_threshold
+        self.context_budget_tokens = context_budget_tokens
+        self.speculative = speculative
+        self.fast_path_max_words = fast_path_max_words
+        self.answer_cache = answer_cache
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+
+    async def aclose(self):
+        """Close the OpenAI client and the search adapter (if this agent created them)."""
+        if self._owns_client:
+            await self.client.close()
+        if self._owns_search_adapter:
+            self.search_adapter.close()
+
+    async def decide_search_queries(self, question: str, num_queries: int = 3) -> List[str]:
+        """
+        Use LLM to decide what search queries to use based on the user's question.
+
+        Args:
+            question: The user's question
+            num_queries: Number of search queries to generate
+
+        Returns:
+            List of search query strings
+        """
+        try:
+            response = await self.client.chat.completions.create(
+                model=self.model,
+                messages=build_query_messages(question, num_queries),
+                temperature=0.7,  # Moderate creativity for diverse queries
+                max_tokens=200
+            )
+
+            return parse_queries(response.choices[0].message.content, num_queries)
+
+        except Exception as e:
+            print(f"Error generating search queries: {e}")
+            # Fallback: use the original question as the query
+            return [question]
+
+    async def search_web(self, query: str, max_results: int = 5) -> List[Dict[str, str]]:
+        """
+        Search the web using DuckDuckGo and return relevant results.
+
+        Args:
+            query: Search query string
+            max_results: Maximum number of results to return
+
+        Returns:
+            List of dictionaries containing 'title', 'body', and 'url' for each result
+        """
+        # The cache may hit SQLite, so keep its I/O off the event loop
+        if self.cache is not None:
+            cached = await asyncio.to_thread(self.cache.get, query, max_results)
+            if cached is not None:
+                return cached
+
+        try:
+            search_results = await asyncio.wait_for(
+                self.search_adapter.text(query, max_results=max_results),
+                timeout=self.search_timeout
+            )
+            results = [parse_search_result(result) for result in search_results]
+
+            if self.cache is not None and results:
+                await asyncio.to_thread(self.cache.set, query, max_results, results)
+
+            return results
+
+        except asyncio.TimeoutError:
+            print(f"Search for query '{query}' timed out after {self.search_timeout}s")
+            return []
+        except Exception as e:
+            print(f"Error during web search for query '{query}': {e}")
+            return []
+
+    async def _timed_search(self, query: str, max_results: int) -> tuple:
+        """Run search_web and also return how long it took."""
+        started = time.perf_counter()
+        results = await self.search_web(query, max_results=max_results)
+        return results, time.perf_counter() - started
+
+    async def fetch_information(self, queries: List[str], results_per_query: int = 3) -> List[Dict[str, Any]]:
+        """
+        Fetch information from the web for all search queries concurrently.
+
+        Args:
+            queries: List of search query strings
+            results_per_query: Number of results to fetch per query
+
+        Returns:
+            List of all search results with query context, in query order
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def search(query: str) -> List[Dict[str, str]]:
+            async with semaphore:
+                print(f"🔍 Searching: {query}")
+                return await self.search_web(query, max_results=results_per_query)
+
+        results_by_query = await asyncio.gather(*(search(query) for query in queries))
+
+        all_results = []
+        for query, results in zip(queries, results_by_query):
+            for result in results:
+                result['query'] = query  # Add query context
+                all_results.append(result)
+
+        return all_results
+
+    async def summarize_answer(self, question: str, search_results: List[Dict[str, Any]]) -> str:
+        """
+        Use LLM to synthesize search results into a coherent answer.
+
+        Args:
+            question: The original user question
+            search_results: List of search results with titles, bodies, and URLs
+
+        Returns:
+            Synthesized answer string
+        """
+        try:
+            response = await self.client.chat.completions.create(
+                model=self.model,
+                messages=build_summary_messages(question, search_results),
+                temperature=0.3,  # Lower temperature for factual accuracy
+                max_tokens=1000
+            )
+
+            return response.choices[0].message.content.strip()
+
+        except Exception as e:
+            return f"Error generating summary: {e}"
+
+    async def summarize_answer_stream(self, question: str, search_results: List[Dict[str, Any]]) -> AsyncIterator[str]:
+        """
+        Stream the synthesized answer as the LLM generates it.
+
+        Args:
+            question: The original user question
+            search_results: List of search results with titles, bodies, and URLs
+
+        Yields:
+            Answer text fragments, in order
+        """
+        try:
+            stream = await self.client.chat.completions.create(
+                model=self.model,
+                messages=build_summary_messages(question, search_results),
+                temperature=0.3,  # Lower temperature for factual accuracy
+                max_tokens=1000,
+                stream=True
+            )
+
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+
+        except Exception as e:
+            yield f"Error generating summary: {e}"
+
+    async def research(self, question: str, num_queries: int = 3, results_per_query: int = 3) -> Dict[str, Any]:
+        """
+        Complete research workflow: decide queries, search, and summarize.
+
+        Args:
+            question: The user's question
+            num_queries: Number of search queries to generate
+            results_per_query: Number of results to fetch per query
+
+        Returns:
+            Dictionary containing the answer, queries used, and sources
+        """
+        async for event in self._research_events(question, num_queries, results_per_query, stream=False):
+            pass
+        return event['result']
+
+    async def research_stream(self, question: str, num_queries: int = 3,
+                              results_per_query: int = 3) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Research workflow that reports progress and streams the answer as it is written.
+
+        Yields the same events as SmartResearchAgent.research_stream().
+        """
+        async for event in self._research_events(question, num_queries, results_per_query, stream=True):
+            yield event
+
+    async def _research_events(self, question: str, num_queries: int, results_per_query: int,
+                               stream: bool) -> AsyncIterator[Dict[str, Any]]:
+        """Run the research pipeline, yielding progress events (shared by research and research_stream)."""
+        print(f"📚 Research Question: {question}")
+
+        timings = {}
+        start = time.perf_counter()
+
+        if self.answer_cache is not None:
+            # Embedding the question is CPU-bound, so keep it off the event loop
+            hit = await asyncio.to_thread(self.answer_cache.lookup, question)
+            if hit is not None:
+                result, similarity = hit
+                result['cached_question'] = result['question']
+                result['question'] = question
+                result['cached'] = True
+                result['cache_similarity'] = similarity
+                result['timings'] = {'total_seconds': time.perf_counter() - start}
+                if stream:
+                    yield {'type': 'token', 'text': result['answer']}
+                yield {'type': 'result', 'result': result}
+                return
+
+        speculative = None
+        try:
+            yield {'type': 'status', 'phase': 'queries'}
+            if len(question.split()) <= self.fast_path_max_words:
+                # Fast path: a short question is already a good search query
+                queries = [question]
+                timings['fast_path'] = True
+            else:
+                if self.speculative:
+                    speculative = asyncio.create_task(self._timed_search(question, results_per_query))
+                queries = await self.decide_search_queries(question, num_queries=num_queries)
+            timings['queries_seconds'] = time.perf_counter() - start
+            yield {'type': 'queries', 'queries': queries}
+
+            yield {'type': 'status', 'phase': 'search'}
+            search_start = time.perf_counter()
+            if speculative is None:
+                search_results = await self.fetch_information(queries, results_per_query=results_per_query)
+            else:
+                # The raw question is being searched already; only search the new queries
+                asked = SearchCache.normalize_query(question)
+                queries = [q for q in queries if SearchCache.normalize_query(q) != asked]
+                search_results = await self.fetch_information(queries, results_per_query=results_per_query)
+                speculative_results, speculative_seconds = await speculative
+                for speculative_result in speculative_results:
+                    speculative_result['query'] = question
+                search_results = speculative_results + search_results
+                queries = [question] + queries
+
+                timings['speculative_search_seconds'] = speculative_seconds
+                # Time the speculative search spent overlapped with query generation
+                timings['hidden_seconds'] = min(speculative_seconds, timings['queries_seconds'])
+
+            dedup_stats = None
+            if self.dedup_threshold is not None:
+                search_results, dedup_stats = dedup_sources(search_results, threshold=self.dedup_threshold)
+
+            context_stats = None
+            if self.context_budget_tokens is not None:
+                search_results, context_stats = pack_context(question, search_results, max_tokens=self.context_budget_tokens)
+            timings['search_seconds'] = time.perf_counter() - search_start
+
+            yield {'type': 'sources', 'sources': search_results,
+                   'dedup_stats': dedup_stats, 'context_stats': context_stats}
+
+            result = {
+                'question': question,
+                'queries': queries,
+                'answer': NO_RESULTS_ANSWER,
+                'sources': search_results,
+                'dedup_stats': dedup_stats,
+                'context_stats': context_stats,
+                'timings': timings,
+                'cached': False
+            }
+
+            if not search_results:
+                timings['total_seconds'] = time.perf_counter() - start
+                yield {'type': 'result', 'result': result}
+                return
+
+            yield {'type': 'status', 'phase': 'summarize'}
+            summarize_start = time.perf_counter()
+            if stream:
+                fragments = []
+                async for text in self.summarize_answer_stream(question, search_results):
+                    fragments.append(text)
+                    yield {'type': 'token', 'text': text}
+                result['answer'] = "".join(fragments).strip()
+            else:
+                result['answer'] = await self.summarize_answer(question, search_results)
+            timings['summarize_seconds'] = time.perf_counter() - summarize_start
+            timings['total_seconds'] = time.perf_counter() - start
+
+            if self.answer_cache is not None and not result['answer'].startswith("Error generating summary"):
+                await asyncio.to_thread(self.answer_cache.store, question, result)
+
+            print(f"✅ Research Complete: {question}")
+
+            yield {'type': 'result', 'result': result}
+        finally:
+            # Don't leave the speculative search running if we were cancelled or abandoned
+            if speculative is not None:
+                speculative.cancel()
+
+
+async def main():
+    """Example usage: research several questions concurrently in one event loop."""
+
+    questions = [
+        "What are the latest developments in quantum computing?",
+        "How does photosynthesis work in plants?",
+        "What is the current state of AI regulation in the EU?"
+    ]
+
+    async with AsyncSmartResearchAgent() as agent:
+        results = await asyncio.gather(
+            *(agent.research(question, num_queries=2, results_per_query=3) for question in questions)
+        )
+
+    for result in results:
+        print("\n" + "="*80)
+        print(f"Question: {result['question']}\n")
+        print(result['answer'])
+        print(f"\n📚 {len(result['sources'])} sources used")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
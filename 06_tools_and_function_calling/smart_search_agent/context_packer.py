@@ -0,0 +1,125 @@
+import math
+import re
+from collections import Counter
+from typing import Dict, Any, List, Tuple
+
+
+# Rough size of a token for English text; good enough for budgeting without a tokenizer
+CHARS_PER_TOKEN = 4
+
+# Characters of "[Source N]\nTitle: \nContent: \nURL: \n" scaffolding around each source
+SOURCE_OVERHEAD_CHARS = 40
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "do", "does", "for", "from", "how",
+    "in", "is", "it", "of", "on", "or", "that", "the", "this", "to", "was", "what",
+    "when", "where", "which", "who", "why", "with",
+}
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens without stopwords."""
+    return [word for word in re.findall(r"\w+", text.lower()) if word not in STOPWORDS]
+
+
+def score_sources(question: str, sources: List[Dict[str, Any]], k1: float = 1.5, b: float = 0.75) -> List[float]:
+    """
+    Score each source against the question with BM25.
+
+    The sources themselves are the corpus for the IDF statistics, so no
+    external index or model is needed.
+    """
+    documents = [tokenize(f"{source.get('title', '')} {source.get('body', '')}") for source in sources]
+    if not documents:
+        return []
+
+    average_length = sum(len(doc) for doc in documents) / len(documents) or 1
+    document_frequency = Counter(word for doc in documents for word in set(doc))
+    query_words = set(tokenize(question))
+
+    scores = []
+    for doc in documents:
+        term_counts = Counter(doc)
+        score = 0.0
+        for word in query_words:
+            count = term_counts.get(word, 0)
+            if not count:
+                continue
+            df = document_frequency[word]
+            idf = math.log(1 + (len(documents) - df + 0.5) / (df + 0.5))
+            score += idf * count * (k1 + 1) / (count + k1 * (1 - b + b * len(doc) / average_length))
+        scores.append(score)
+    return scores
+
+
+def truncate_at_sentence(text: str, max_chars: int) -> str:
+    """
+    Shorten text to at most max_chars, cutting at the last full sentence.
+
+    Falls back to the last word boundary when no sentence ends in range.
+    """
+    if len(text) <= max_chars:
+        return text
+
+    window = text[:max_chars]
+    sentence_ends = [match.end() for match in re.finditer(r"[.!?](?=\s|$)", window)]
+    if sentence_ends:
+        return window[:sentence_ends[-1]]
+
+    cut = window.rfind(" ")
+    return (window[:cut] if cut > 0 else window[:max_chars - 1]).rstrip() + "…"
+
+
+def pack_context(question: str, sources: List[Dict[str, Any]], max_tokens: int = 3000,
+                 min_body_chars: int = 80) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+    """
+    Choose the sources that go into the summarization prompt under a size budget.
+
+    Sources are ranked by BM25 relevance to the question and added greedily,
+    most relevant first. A source that doesn't fit whole is cut at a sentence
+    boundary if at least min_body_chars of its body still fit; otherwise it
+    is dropped. The returned list is in prompt order, so [Source N] in the
+    answer refers to the N-th returned source.
+
+    Args:
+        question: The user's question
+        sources: Candidate search results
+        max_tokens: Approximate token budget for all sources together
+        min_body_chars: Smallest useful body to keep when truncating
+
+    Returns:
+        Tuple of (packed sources, stats dict)
+    """
+    budget_chars = max_tokens * CHARS_PER_TOKEN
+    scores = score_sources(question, sources)
+    ranked = sorted(range(len(sources)), key=lambda i: scores[i], reverse=True)
+
+    packed = []
+    used_chars = 0
+    truncated = 0
+
+    for i in ranked:
+        source = sources[i]
+        frame_chars = SOURCE_OVERHEAD_CHARS + len(source.get('title', '')) + len(source.get('url', ''))
+        body = source.get('body', '')
+        remaining = budget_chars - used_chars
+
+        if frame_chars + len(body) > remaining:
+            if remaining - frame_chars < min_body_chars:
+                continue
+            body = truncate_at_sentence(body, remaining - frame_chars)
+            source = dict(source, body=body)
+            truncated += 1
+
+        packed.append(source)
+        used_chars += frame_chars + len(body)
+
+    stats = {
+        'budget_tokens': max_tokens,
+        'used_tokens': math.ceil(used_chars / CHARS_PER_TOKEN),
+        'sources_considered': len(sources),
+        'sources_packed': len(packed),
+        'sources_truncated': truncated,
+        'sources_dropped': len(sources) - len(packed),
+    }
+    return packed, stats
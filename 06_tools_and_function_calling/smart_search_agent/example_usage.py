@@ -4,6 +4,7 @@ Run this file to see the agent in action with different types of questions
 """
 
 from smart_research_agent import SmartResearchAgent
+from rate_limiter import RateLimiter
 
 
 def example_1_simple_question():
@@ -85,6 +86,29 @@ def example_5_how_to():
     print(f"\n📝 Answer:\n{result['answer']}")
 
 
+def example_6_batch():
+    """Example 6: Research several questions at once."""
+    print("\n" + "="*80)
+    print("EXAMPLE 6: Batch Research")
+    print("="*80)
+    
+    agent = SmartResearchAgent(
+        llm_limiter=RateLimiter(rate=5),     # At most ~5 LLM calls per second
+        search_limiter=RateLimiter(rate=2)   # Be gentle with DuckDuckGo
+    )
+    
+    questions = [
+        "What is the capital of France?",
+        "What are the differences between Python and JavaScript?",
+        "How to get started with machine learning?"
+    ]
+    results = agent.research_many(questions, concurrency=3, num_queries=2, results_per_query=2)
+    
+    for result in results:
+        print(f"\n❓ {result['question']} ({result['timings'].get('total_seconds', 0):.1f}s)")
+        print(f"📝 {result['answer']}")
+
+
 def interactive_mode():
     """Interactive mode: Ask your own questions."""
     print("\n" + "="*80)
@@ -132,11 +156,12 @@ def main():
     print("  3. Current events")
     print("  4. Comparison question")
     print("  5. How-to question")
-    print("  6. Interactive mode (ask your own questions)")
-    print("  7. Run all examples")
+    print("  6. Batch research (several questions at once)")
+    print("  7. Interactive mode (ask your own questions)")
+    print("  8. Run all examples")
     print("  q. Quit")
     
-    choice = input("\nEnter your choice (1-7 or q): ").strip()
+    choice = input("\nEnter your choice (1-8 or q): ").strip()
     
     examples = {
         '1': example_1_simple_question,
@@ -144,12 +169,13 @@ def main():
         '3': example_3_current_events,
         '4': example_4_comparison,
         '5': example_5_how_to,
-        '6': interactive_mode,
+        '6': example_6_batch,
+        '7': interactive_mode,
     }
     
-    if choice == '7':
+    if choice == '8':
         # Run all non-interactive examples
-        for i in range(1, 6):
+        for i in range(1, 7):
             examples[str(i)]()
     elif choice in examples:
         examples[choice]()
@@ -0,0 +1,67 @@
+import threading
+import time
+
+
+class RateLimiter:
+    """
+    Thread-safe token bucket rate limiter.
+
+    Allows `rate` calls per second on average with bursts of up to `burst`
+    calls. Share one instance between threads (or agents) to put them all
+    under the same limit.
+    """
+
+    def __init__(self, rate: float, burst: int = None):
+        """
+        Initialize the limiter.
+
+        Args:
+            rate: Average number of calls allowed per second
+            burst: Maximum number of calls allowed back to back (defaults to rate, at least 1)
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+
+        self.rate = rate
+        self.burst = burst or max(1, int(rate))
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a call is allowed."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+
+            time.sleep(wait)
+
+
+# Defaults for agents that aren't given limiters of their own
+DEFAULT_LLM_RATE = 10.0      # LLM calls per second
+DEFAULT_SEARCH_RATE = 5.0    # Searches per second
+DEFAULT_BURST = 10
+
+_shared_limiters = {}
+_shared_lock = threading.Lock()
+
+
+def get_shared_limiter(name: str, rate: float, burst: int = None) -> RateLimiter:
+    """
+    Return the process-wide limiter called `name`, creating it on first use.
+
+    Every agent without a limiter of its own shares these, so concurrent
+    batches (and agents) stay under one overall rate. rate and burst only
+    apply when the limiter is created.
+    """
+    with _shared_lock:
+        if name not in _shared_limiters:
+            _shared_limiters[name] = RateLimiter(rate, burst)
+        return _shared_limiters[name]
@@ -0,0 +1,186 @@
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional
+
+
+class SearchCache:
+    """
+    Two-tier cache for web search results.
+
+    Tier 1 is an in-memory LRU; tier 2 is an optional SQLite file that survives
+    restarts. Entries are keyed on the normalized query plus max_results, expire
+    after a TTL, and both tiers are size-bounded. All methods are thread-safe, so
+    one cache can be shared by every agent in a process.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 3600,
+                 db_path: str = None, max_db_entries: int = 100_000):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of entries kept in memory
+            ttl_seconds: Default time-to-live for an entry
+            db_path: Path to a SQLite file for the on-disk tier (None = memory only)
+            max_db_entries: Maximum number of entries kept on disk
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_db_entries = max_db_entries
+
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS search_cache ("
+                "key TEXT PRIMARY KEY, results TEXT NOT NULL, "
+                "expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._db.commit()
+            # Row count kept in memory, so writes never need a COUNT(*) table scan
+            self._db_rows = self._db.execute("SELECT COUNT(*) FROM search_cache").fetchone()[0]
+
+    @staticmethod
+    def normalize_query(query: str) -> str:
+        """
+        Normalize a query so near-identical strings share a cache entry.
+
+        Lowercases, drops punctuation and collapses whitespace, so
+        "Python, programming" and "python programming" match. Word order is
+        kept: "convert int to str" and "convert str to int" are different
+        queries.
+        """
+        words = re.sub(r"[^\w\s]", " ", query.lower()).split()
+        return " ".join(words)
+
+    def make_key(self, query: str, max_results: int) -> str:
+        return f"{self.normalize_query(query)}|{max_results}"
+
+    def get(self, query: str, max_results: int) -> Optional[List[Dict[str, Any]]]:
+        """
+        Look up cached results.
+
+        Returns:
+            A fresh copy of the cached results, or None on a miss
+        """
+        key = self.make_key(query, max_results)
+        now = time.time()
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires_at, results = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    return [dict(result) for result in results]
+                del self._memory[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT results, expires_at FROM search_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and row[1] > now:
+                    results = json.loads(row[0])
+                    self._db.execute("UPDATE search_cache SET accessed_at = ? WHERE key = ?", (now, key))
+                    self._db.commit()
+                    self._remember(key, row[1], results)
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return [dict(result) for result in results]
+
+            self.misses += 1
+            return None
+
+    def set(self, query: str, max_results: int, results: List[Dict[str, Any]], ttl_seconds: float = None):
+        """
+        Store search results.
+
+        Args:
+            query: Search query string
+            max_results: max_results the search was run with
+            results: Search results to cache
+            ttl_seconds: Time-to-live for this entry (defaults to the cache's TTL)
+        """
+        key = self.make_key(query, max_results)
+        now = time.time()
+        expires_at = now + (self.ttl_seconds if ttl_seconds is None else ttl_seconds)
+        results = [dict(result) for result in results]
+
+        with self._lock:
+            self._remember(key, expires_at, results)
+
+            if self._db is not None:
+                exists = self._db.execute("SELECT 1 FROM search_cache WHERE key = ?", (key,)).fetchone()
+                self._db.execute(
+                    "INSERT OR REPLACE INTO search_cache (key, results, expires_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    (key, json.dumps(results), expires_at, now)
+                )
+                if exists is None:
+                    self._db_rows += 1
+                if self._db_rows > self.max_db_entries:
+                    self._evict_disk(now)
+                self._db.commit()
+
+    def _remember(self, key: str, expires_at: float, results: List[Dict[str, Any]]):
+        """Put an entry in the memory tier, evicting the least recently used ones."""
+        self._memory[key] = (expires_at, results)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _evict_disk(self, now: float):
+        """
+        Drop expired rows, then the least recently used ones.
+
+        Runs only when the disk tier is over max_db_entries, and shrinks it to
+        90% of that, so the table scans are spread over many writes.
+        """
+        self._db_rows -= self._db.execute("DELETE FROM search_cache WHERE expires_at <= ?", (now,)).rowcount
+        target = int(self.max_db_entries * 0.9)
+        if self._db_rows > target:
+            self._db_rows -= self._db.execute(
+                "DELETE FROM search_cache WHERE key IN ("
+                "SELECT key FROM search_cache ORDER BY accessed_at LIMIT ?)",
+                (self._db_rows - target,)
+            ).rowcount
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'disk_hits': self.disk_hits,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'memory_entries': len(self._memory),
+            }
+
+    def clear(self):
+        """Remove every entry from both tiers and reset the counters."""
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM search_cache")
+                self._db.commit()
+                self._db_rows = 0
+            self.hits = self.misses = self.disk_hits = 0
+
+    def close(self):
+        """Close the SQLite connection."""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
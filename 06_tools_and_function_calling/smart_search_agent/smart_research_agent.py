@@ -1,8 +1,107 @@
 import os
-from typing import Dict, Any, List
+import sys
+import time
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Any, Iterator, List
 from openai import OpenAI
 from duckduckgo_search import DDGS
 
+try:
+    from common.client_provider import get_default_provider
+except ImportError:
+    # common/ not installed (`pip install -e .` at the repo root): use the checkout
+    sys.path.append(str(Path(__file__).resolve().parents[2]))
+    from common.client_provider import get_default_provider
+
+from context_packer import pack_context
+from rate_limiter import DEFAULT_BURST, DEFAULT_LLM_RATE, DEFAULT_SEARCH_RATE, RateLimiter, get_shared_limiter
+from search_cache import SearchCache
+from source_dedup import dedup_sources
+
+if TYPE_CHECKING:
+    from answer_cache import SemanticAnswerCache
+
+
+# Prompts shared by the sync and async agents
+QUERY_SYSTEM_PROMPT = """You are a search query expert. Your job is to analyze a user's question 
+and generate the most effective search queries to find relevant information.
+
+Generate diverse, specific search queries that will help gather comprehensive information.
+Consider different angles, related topics, and specific terms that would yield good results."""
+
+QUERY_PROMPT_TEMPLATE = """Question: {question}
+
+Generate {num_queries} diverse and effective search queries to find information that will help answer this question.
+Return ONLY the search queries, one per line, without numbering or additional text."""
+
+SUMMARY_SYSTEM_PROMPT = """You are a research assistant that synthesizes information from multiple sources 
+to provide accurate, comprehensive answers. 
+
+Your responsibilities:
+1. Analyze all provided sources carefully
+2. Extract relevant information that answers the question
+3. Synthesize information into a clear, well-structured answer
+4. Cite sources by referencing [Source N] numbers
+5. If sources conflict, acknowledge different perspectives
+6. If information is insufficient, state what's missing
+
+Provide factual, balanced answers based on the evidence."""
+
+SUMMARY_PROMPT_TEMPLATE = """Question: {question}
+
+Search Results:
+{sources_text}
+
+Based on these search results, provide a comprehensive answer to the question. 
+Include relevant citations using [Source N] format. Structure your answer clearly."""
+
+NO_RESULTS_ANSWER = "I couldn't find any relevant information to answer your question."
+
+
+def build_query_messages(question: str, num_queries: int) -> List[Dict[str, str]]:
+    """Build the chat messages that ask the LLM for search queries."""
+    return [
+        {"role": "system", "content": QUERY_SYSTEM_PROMPT},
+        {"role": "user", "content": QUERY_PROMPT_TEMPLATE.format(question=question, num_queries=num_queries)}
+    ]
+
+
+def parse_queries(queries_text: str, num_queries: int) -> List[str]:
+    """Split the LLM's query list into clean query strings."""
+    queries = [q.strip() for q in queries_text.strip().split('\n') if q.strip()]
+    return queries[:num_queries]  # Ensure we don't exceed requested number
+
+
+def parse_search_result(result: Dict[str, Any]) -> Dict[str, str]:
+    """Convert a raw DuckDuckGo result into the agent's source format."""
+    return {
+        'title': result.get('title', ''),
+        'body': result.get('body', ''),
+        'url': result.get('href', '')
+    }
+
+
+def build_summary_messages(question: str, search_results: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+    """Build the chat messages that ask the LLM to synthesize an answer from sources."""
+    # Format search results for the LLM
+    formatted_results = []
+    for i, result in enumerate(search_results, 1):
+        formatted_results.append(
+            f"[Source {i}]\n"
+            f"Title: {result['title']}\n"
+            f"Content: {result['body']}\n"
+            f"URL: {result['url']}\n"
+        )
+    
+    sources_text = "\n".join(formatted_results)
+    
+    return [
+        {"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
+        {"role": "user", "content": SUMMARY_PROMPT_TEMPLATE.format(question=question, sources_text=sources_text)}
+    ]
+
 
 class SmartResearchAgent:
     """
@@ -15,21 +114,55 @@ class SmartResearchAgent:
     4. LLM summarizes the findings into a coherent answer
     """
     
-    def __init__(self, api_key: str = None, model: str = "gpt-4o-mini"):
+    def __init__(self, api_key: str = None, model: str = "gpt-4o-mini",
+                 max_concurrency: int = 4, search_timeout: float = 10.0,
+                 cache: SearchCache = None, dedup_threshold: float = 0.8,
+                 context_budget_tokens: int = 3000,
+                 llm_limiter: RateLimiter = None, search_limiter: RateLimiter = None,
+                 speculative: bool = False, fast_path_max_words: int = 0,
+                 answer_cache: "SemanticAnswerCache" = None,
+                 client: OpenAI = None, search_client: DDGS = None):
         """
         Initialize the research agent.
         
         Args:
             api_key: OpenAI API key (defaults to OPENAI_API_KEY env var)
             model: OpenAI model to use for query generation and summarization
+            max_concurrency: Maximum number of searches run in parallel (1 = sequential)
+            search_timeout: Seconds to wait for a single search query before giving up
+            cache: Optional search result cache (can be shared between agents)
+            dedup_threshold: Body similarity above which sources are collapsed (None = no dedup)
+            context_budget_tokens: Approximate token budget for sources in the summary prompt (None = no limit)
+            llm_limiter: Rate limiter applied to every LLM call (defaults to one shared by all agents)
+            search_limiter: Rate limiter applied to every search, cache hits are free (defaults to one
+                shared by all agents)
+            speculative: Search the raw question while the LLM is still generating queries
+            fast_path_max_words: Questions this short skip query generation and are searched as-is (0 = never)
+            answer_cache: Optional semantic cache that answers paraphrased repeat questions
+            client: OpenAI client to use (defaults to the shared, pooled client for api_key)
+            search_client: DDGS client to use (defaults to the shared one)
         """
         self.api_key = api_key or os.getenv("OPENAI_API_KEY")
-        if not self.api_key:
+        if client is None and not self.api_key:
             raise ValueError("OpenAI API key must be provided or set in OPENAI_API_KEY environment variable")
         
-        self.client = OpenAI(api_key=self.api_key)
+        provider = get_default_provider()
+        self.client = client or provider.openai(self.api_key)
         self.model = model
-        self.search_client = DDGS()
+        self.max_concurrency = max(1, max_concurrency)
+        self.search_timeout = search_timeout
+        self.search_client = search_client or provider.search(search_timeout)
+        self.cache = cache
+        self.dedup_threshold = dedup_threshold
+        self.context_budget_tokens = context_budget_tokens
+        self.llm_limiter = llm_limiter or get_shared_limiter("llm", DEFAULT_LLM_RATE, DEFAULT_BURST)
+        self.search_limiter = search_limiter or get_shared_limiter("search", DEFAULT_SEARCH_RATE, DEFAULT_BURST)
+        self.speculative = speculative
+        self.fast_path_max_words = fast_path_max_words
+        self.answer_cache = answer_cache
+        
+        # Guards the shared-searches dict of each research_many batch
+        self._batch_lock = threading.Lock()
     
     def decide_search_queries(self, question: str, num_queries: int = 3) -> List[str]:
         """
@@ -42,32 +175,17 @@ class SmartResearchAgent:
         Returns:
             List of search query strings
         """
-        system_prompt = """You are a search query expert. Your job is to analyze a user's question 
-and generate the most effective search queries to find relevant information.
-
-Generate diverse, specific search queries that will help gather comprehensive information.
-Consider different angles, related topics, and specific terms that would yield good results."""
-
-        user_prompt = f"""Question: {question}
-
-Generate {num_queries} diverse and effective search queries to find information that will help answer this question.
-Return ONLY the search queries, one per line, without numbering or additional text."""
-
         try:
+            if self.llm_limiter:
+                self.llm_limiter.acquire()
             response = self.client.chat.completions.create(
                 model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
+                messages=build_query_messages(question, num_queries),
                 temperature=0.7,  # Moderate creativity for diverse queries
                 max_tokens=200
             )
             
-            queries_text = response.choices[0].message.content.strip()
-            queries = [q.strip() for q in queries_text.split('\n') if q.strip()]
-            
-            return queries[:num_queries]  # Ensure we don't exceed requested number
+            return parse_queries(response.choices[0].message.content, num_queries)
             
         except Exception as e:
             print(f"Error generating search queries: {e}")
@@ -78,6 +196,9 @@ Return ONLY the search queries, one per line, without numbering or additional te
         """
         Search the web using DuckDuckGo and return relevant results.
         
+        Results are served from the cache when one is configured and holds a
+        fresh entry for this query.
+        
         Args:
             query: Search query string
             max_results: Maximum number of results to return
@@ -85,16 +206,22 @@ Return ONLY the search queries, one per line, without numbering or additional te
         Returns:
             List of dictionaries containing 'title', 'body', and 'url' for each result
         """
+        if self.cache is not None:
+            cached = self.cache.get(query, max_results)
+            if cached is not None:
+                return cached
+        
         try:
+            if self.search_limiter:
+                self.search_limiter.acquire()
             results = []
             search_results = self.search_client.text(query, max_results=max_results)
             
             for result in search_results:
-                results.append({
-                    'title': result.get('title', ''),
-                    'body': result.get('body', ''),
-                    'url': result.get('href', '')
-                })
+                results.append(parse_search_result(result))
+            
+            if self.cache is not None and results:
+                self.cache.set(query, max_results, results)
             
             return results
             
@@ -102,29 +229,187 @@ Return ONLY the search queries, one per line, without numbering or additional te
             print(f"Error during web search for query '{query}': {e}")
             return []
     
-    def fetch_information(self, queries: List[str], results_per_query: int = 3) -> List[Dict[str, Any]]:
+    def fetch_information(self, queries: List[str], results_per_query: int = 3,
+                          batch_searches: Dict[tuple, Future] = None) -> List[Dict[str, Any]]:
         """
         Fetch information from the web for all search queries.
         
+        Queries run concurrently (up to max_concurrency at a time), so the fetch
+        step takes roughly as long as the slowest query. Results are still
+        returned in query order. A query that fails or exceeds search_timeout
+        contributes no results instead of holding up the others.
+        
         Args:
             queries: List of search query strings
             results_per_query: Number of results to fetch per query
+            batch_searches: Searches shared with the other questions of a
+                research_many batch (None outside a batch)
             
         Returns:
             List of all search results with query context
         """
-        all_results = []
+        if self.max_concurrency == 1 or len(queries) <= 1:
+            results_by_query = []
+            for query in queries:
+                print(f"🔍 Searching: {query}")
+                results_by_query.append(self._search(query, results_per_query, batch_searches))
+        else:
+            results_by_query = self._search_concurrently(queries, results_per_query, batch_searches)
         
-        for query in queries:
-            print(f"🔍 Searching: {query}")
-            results = self.search_web(query, max_results=results_per_query)
-            
+        all_results = []
+        for query, results in zip(queries, results_by_query):
             for result in results:
                 result['query'] = query  # Add query context
                 all_results.append(result)
         
         return all_results
     
+    def _search(self, query: str, max_results: int,
+                batch_searches: Dict[tuple, Future] = None) -> List[Dict[str, str]]:
+        """
+        Call search_web, sharing results between questions during research_many.
+        
+        Inside a batch (batch_searches given), the first question to need a
+        (normalized) query runs the search and every other question waits for
+        and reuses its results.
+        """
+        shared = batch_searches
+        if shared is None:
+            return self.search_web(query, max_results=max_results)
+        
+        key = (SearchCache.normalize_query(query), max_results)
+        with self._batch_lock:
+            future = shared.get(key)
+            owner = future is None
+            if owner:
+                future = shared[key] = Future()
+        
+        if owner:
+            try:
+                future.set_result(self.search_web(query, max_results=max_results))
+            except BaseException as e:
+                future.set_exception(e)
+                raise
+        
+        # Copies, because fetch_information tags each result with its query
+        return [dict(result) for result in future.result()]
+    
+    def _start_speculative_search(self, question: str, max_results: int,
+                                  batch_searches: Dict[tuple, Future] = None) -> Future:
+        """Start searching the raw question in the background; the future yields (results, seconds)."""
+        def run() -> tuple:
+            started = time.perf_counter()
+            results = self._search(question, max_results, batch_searches)
+            return results, time.perf_counter() - started
+        
+        print(f"🔍 Searching (speculative): {question}")
+        executor = ThreadPoolExecutor(max_workers=1)
+        future = executor.submit(run)
+        executor.shutdown(wait=False)
+        return future
+    
+    def _finish_speculative_search(self, future: Future) -> tuple:
+        """Wait for the speculative search, giving up after search_timeout."""
+        try:
+            return future.result(timeout=self.search_timeout)
+        except FutureTimeoutError:
+            print(f"Speculative search timed out after {self.search_timeout}s")
+            return [], self.search_timeout
+        except Exception as e:
+            print(f"Error during speculative search: {e}")
+            return [], 0.0
+    
+    def _search_concurrently(self, queries: List[str], results_per_query: int,
+                             batch_searches: Dict[tuple, Future] = None) -> List[List[Dict[str, str]]]:
+        """
+        Run search_web for every query on a thread pool.
+        
+        Each query gets its own search_timeout, measured from when it actually
+        starts running (queries may wait for a free worker first).
+        
+        Returns:
+            One list of results per query, in the same order as queries
+        """
+        started = {}
+        lock = threading.Lock()
+        
+        def run(position: int, query: str) -> List[Dict[str, str]]:
+            with lock:
+                started[position] = time.monotonic()
+            return self._search(query, results_per_query, batch_searches)
+        
+        executor = ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(queries)))
+        try:
+            futures = []
+            for position, query in enumerate(queries):
+                print(f"🔍 Searching: {query}")
+                futures.append(executor.submit(run, position, query))
+            
+            results_by_query = []
+            for position, (query, future) in enumerate(zip(queries, futures)):
+                results = []
+                while True:
+                    with lock:
+                        start = started.get(position)
+                    wait = self.search_timeout if start is None else start + self.search_timeout - time.monotonic()
+                    try:
+                        results = future.result(timeout=max(wait, 0))
+                        break
+                    except FutureTimeoutError:
+                        if start is not None:
+                            future.cancel()
+                            print(f"Search for query '{query}' timed out after {self.search_timeout}s")
+                            break
+                        # Still queued behind other queries; its timeout hasn't started yet
+                    except Exception as e:
+                        print(f"Error during web search for query '{query}': {e}")
+                        break
+                results_by_query.append(results)
+            
+            return results_by_query
+        finally:
+            # Don't block on searches that timed out; their threads finish in the background
+            executor.shutdown(wait=False, cancel_futures=True)
+    
+    def deduplicate_sources(self, search_results: List[Dict[str, Any]]) -> tuple:
+        """
+        Collapse duplicate URLs and near-duplicate snippets before summarization.
+        
+        Args:
+            search_results: Results from fetch_information
+            
+        Returns:
+            Tuple of (deduplicated results, dedup stats or None if dedup is disabled)
+        """
+        if self.dedup_threshold is None:
+            return search_results, None
+        
+        deduped, stats = dedup_sources(search_results, threshold=self.dedup_threshold)
+        if stats['duplicates_removed']:
+            print(f"🧹 Removed {stats['duplicates_removed']} duplicate sources "
+                  f"({stats['chars_saved']} chars, ~{stats['tokens_saved']} tokens saved)")
+        return deduped, stats
+    
+    def pack_sources(self, question: str, search_results: List[Dict[str, Any]]) -> tuple:
+        """
+        Rank sources by relevance and fit them into the context budget.
+        
+        Args:
+            question: The user's question
+            search_results: Deduplicated search results
+            
+        Returns:
+            Tuple of (sources in prompt order, packing stats or None if there is no budget)
+        """
+        if self.context_budget_tokens is None:
+            return search_results, None
+        
+        packed, stats = pack_context(question, search_results, max_tokens=self.context_budget_tokens)
+        if stats['sources_dropped'] or stats['sources_truncated']:
+            print(f"📦 Packed {stats['sources_packed']}/{stats['sources_considered']} sources "
+                  f"into ~{stats['used_tokens']} tokens ({stats['sources_truncated']} truncated)")
+        return packed, stats
+    
     def summarize_answer(self, question: str, search_results: List[Dict[str, Any]]) -> str:
         """
         Use LLM to synthesize search results into a coherent answer.
@@ -136,46 +421,12 @@ Return ONLY the search queries, one per line, without numbering or additional te
         Returns:
             Synthesized answer string
         """
-        # Format search results for the LLM
-        formatted_results = []
-        for i, result in enumerate(search_results, 1):
-            formatted_results.append(
-                f"[Source {i}]\n"
-                f"Title: {result['title']}\n"
-                f"Content: {result['body']}\n"
-                f"URL: {result['url']}\n"
-            )
-        
-        sources_text = "\n".join(formatted_results)
-        
-        system_prompt = """You are a research assistant that synthesizes information from multiple sources 
-to provide accurate, comprehensive answers. 
-
-Your responsibilities:
-1. Analyze all provided sources carefully
-2. Extract relevant information that answers the question
-3. Synthesize information into a clear, well-structured answer
-4. Cite sources by referencing [Source N] numbers
-5. If sources conflict, acknowledge different perspectives
-6. If information is insufficient, state what's missing
-
-Provide factual, balanced answers based on the evidence."""
-
-        user_prompt = f"""Question: {question}
-
-Search Results:
-{sources_text}
-
-Based on these search results, provide a comprehensive answer to the question. 
-Include relevant citations using [Source N] format. Structure your answer clearly."""
-
         try:
+            if self.llm_limiter:
+                self.llm_limiter.acquire()
             response = self.client.chat.completions.create(
                 model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
+                messages=build_summary_messages(question, search_results),
                 temperature=0.3,  # Lower temperature for factual accuracy
                 max_tokens=1000
             )
@@ -186,6 +437,35 @@ Include relevant citations using [Source N] format. Structure your answer clearl
         except Exception as e:
             return f"Error generating summary: {e}"
     
+    def summarize_answer_stream(self, question: str, search_results: List[Dict[str, Any]]) -> Iterator[str]:
+        """
+        Stream the synthesized answer as the LLM generates it.
+        
+        Args:
+            question: The original user question
+            search_results: List of search results with titles, bodies, and URLs
+            
+        Yields:
+            Answer text fragments, in order
+        """
+        try:
+            if self.llm_limiter:
+                self.llm_limiter.acquire()
+            stream = self.client.chat.completions.create(
+                model=self.model,
+                messages=build_summary_messages(question, search_results),
+                temperature=0.3,  # Lower temperature for factual accuracy
+                max_tokens=1000,
+                stream=True
+            )
+            
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+                    
+        except Exception as e:
+            yield f"Error generating summary: {e}"
+    
     def research(self, question: str, num_queries: int = 3, results_per_query: int = 3) -> Dict[str, Any]:
         """
         Complete research workflow: decide queries, search, and summarize.
@@ -198,42 +478,210 @@ Include relevant citations using [Source N] format. Structure your answer clearl
         Returns:
             Dictionary containing the answer, queries used, and sources
         """
+        for event in self._research_events(question, num_queries, results_per_query, stream=False):
+            pass
+        return event['result']
+    
+    def research_stream(self, question: str, num_queries: int = 3, results_per_query: int = 3) -> Iterator[Dict[str, Any]]:
+        """
+        Research workflow that reports progress and streams the answer as it is written.
+        
+        Yields event dicts, each with a 'type':
+        - 'status': a phase started ('phase' is 'queries', 'search' or 'summarize')
+        - 'queries': the generated search queries ('queries')
+        - 'sources': the sources that go into the prompt ('sources', 'dedup_stats', 'context_stats')
+        - 'token': a fragment of the answer ('text')
+        - 'result': the final dict, identical in shape to research() ('result')
+        
+        Args:
+            question: The user's question
+            num_queries: Number of search queries to generate
+            results_per_query: Number of results to fetch per query
+        """
+        yield from self._research_events(question, num_queries, results_per_query, stream=True)
+    
+    def _research_events(self, question: str, num_queries: int, results_per_query: int,
+                         stream: bool, batch_searches: Dict[tuple, Future] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Run the research pipeline, yielding progress events (shared by research and research_stream).
+        
+        batch_searches is the shared-searches dict of the research_many batch
+        this question belongs to, if any.
+        """
         print(f"\n{'='*80}")
         print(f"📚 Research Question: {question}")
         print(f"{'='*80}\n")
         
+        timings = {}
+        start = time.perf_counter()
+        
+        cached = self._lookup_answer(question, start)
+        if cached is not None:
+            print("♻️  Answered from cache\n")
+            if stream:
+                yield {'type': 'token', 'text': cached['answer']}
+            yield {'type': 'result', 'result': cached}
+            return
+        
         # Step 1: Decide what to search
-        print("🤔 Step 1: Generating search queries...")
-        queries = self.decide_search_queries(question, num_queries=num_queries)
+        yield {'type': 'status', 'phase': 'queries'}
+        speculative = None
+        if len(question.split()) <= self.fast_path_max_words:
+            # Fast path: a short question is already a good search query
+            print("⚡ Step 1: Short question, skipping query generation...")
+            queries = [question]
+            timings['fast_path'] = True
+        else:
+            print("🤔 Step 1: Generating search queries...")
+            if self.speculative:
+                speculative = self._start_speculative_search(question, results_per_query, batch_searches)
+            queries = self.decide_search_queries(question, num_queries=num_queries)
+        timings['queries_seconds'] = time.perf_counter() - start
         print(f"Generated queries: {queries}\n")
+        yield {'type': 'queries', 'queries': queries}
         
         # Step 2: Fetch information
         print("🌐 Step 2: Fetching information from the web...")
-        search_results = self.fetch_information(queries, results_per_query=results_per_query)
-        print(f"Found {len(search_results)} results\n")
+        yield {'type': 'status', 'phase': 'search'}
+        search_start = time.perf_counter()
+        if speculative is None:
+            search_results = self.fetch_information(queries, results_per_query, batch_searches)
+        else:
+            # The raw question was searched already; only search the new queries
+            asked = SearchCache.normalize_query(question)
+            queries = [q for q in queries if SearchCache.normalize_query(q) != asked]
+            search_results = self.fetch_information(queries, results_per_query, batch_searches)
+            
+            speculative_results, speculative_seconds = self._finish_speculative_search(speculative)
+            for speculative_result in speculative_results:
+                speculative_result['query'] = question
+            search_results = speculative_results + search_results
+            queries = [question] + queries
+            
+            timings['speculative_search_seconds'] = speculative_seconds
+            # Time the speculative search spent overlapped with query generation
+            timings['hidden_seconds'] = min(speculative_seconds, timings['queries_seconds'])
+        print(f"Found {len(search_results)} results")
+        search_results, dedup_stats = self.deduplicate_sources(search_results)
+        search_results, context_stats = self.pack_sources(question, search_results)
+        timings['search_seconds'] = time.perf_counter() - search_start
+        print()
+        yield {'type': 'sources', 'sources': search_results,
+               'dedup_stats': dedup_stats, 'context_stats': context_stats}
+        
+        result = {
+            'question': question,
+            'queries': queries,
+            'answer': NO_RESULTS_ANSWER,
+            'sources': search_results,
+            'dedup_stats': dedup_stats,
+            'context_stats': context_stats,
+            'timings': timings,
+            'cached': False
+        }
         
         if not search_results:
-            return {
-                'question': question,
-                'queries': queries,
-                'answer': "I couldn't find any relevant information to answer your question.",
-                'sources': []
-            }
+            timings['total_seconds'] = time.perf_counter() - start
+            yield {'type': 'result', 'result': result}
+            return
         
         # Step 3: Summarize answer
         print("✍️  Step 3: Synthesizing answer...")
-        answer = self.summarize_answer(question, search_results)
+        yield {'type': 'status', 'phase': 'summarize'}
+        summarize_start = time.perf_counter()
+        if stream:
+            fragments = []
+            for text in self.summarize_answer_stream(question, search_results):
+                fragments.append(text)
+                yield {'type': 'token', 'text': text}
+            result['answer'] = "".join(fragments).strip()
+        else:
+            result['answer'] = self.summarize_answer(question, search_results)
+        timings['summarize_seconds'] = time.perf_counter() - summarize_start
+        timings['total_seconds'] = time.perf_counter() - start
+        
+        if self.answer_cache is not None and not result['answer'].startswith("Error generating summary"):
+            self.answer_cache.store(question, result)
         
         print(f"\n{'='*80}")
         print("✅ Research Complete!")
         print(f"{'='*80}\n")
         
-        return {
-            'question': question,
-            'queries': queries,
-            'answer': answer,
-            'sources': search_results
-        }
+        yield {'type': 'result', 'result': result}
+    
+    def _lookup_answer(self, question: str, start: float) -> Dict[str, Any]:
+        """Return a cached result for this question (or a paraphrase), or None."""
+        if self.answer_cache is None:
+            return None
+        
+        hit = self.answer_cache.lookup(question)
+        if hit is None:
+            return None
+        
+        result, similarity = hit
+        result['cached_question'] = result['question']
+        result['question'] = question
+        result['cached'] = True
+        result['cache_similarity'] = similarity
+        result['timings'] = {'total_seconds': time.perf_counter() - start}
+        return result
+    
+    def research_many(self, questions: List[str], concurrency: int = 4,
+                      num_queries: int = 3, results_per_query: int = 3) -> List[Dict[str, Any]]:
+        """
+        Research many questions concurrently.
+        
+        Questions run on a thread pool of `concurrency` workers. All of them go
+        through this agent's llm_limiter and search_limiter (by default the
+        process-wide ones every agent shares; pass your own to match your API
+        quotas). Search queries that several questions generate are only
+        searched once per batch.
+        
+        Args:
+            questions: Questions to research
+            concurrency: Number of questions researched at the same time
+            num_queries: Number of search queries to generate per question
+            results_per_query: Number of results to fetch per query
+            
+        Returns:
+            One result dict per question, in input order, all with the same
+            keys. A question that failed has an 'error', a None answer, empty
+            stats and the seconds it took in 'timings'.
+        """
+        # In-flight and finished searches of this batch only, so concurrent
+        # batches (or research() calls) on the same agent never share them
+        batch_searches = {}
+        
+        def run(question: str) -> Dict[str, Any]:
+            question_start = time.perf_counter()
+            try:
+                for event in self._research_events(question, num_queries, results_per_query,
+                                                   stream=False, batch_searches=batch_searches):
+                    pass
+                return event['result']
+            except Exception as e:
+                return {
+                    'question': question,
+                    'queries': [],
+                    'answer': None,
+                    'sources': [],
+                    'error': str(e),
+                    'dedup_stats': {},
+                    'context_stats': {},
+                    'timings': {'total_seconds': time.perf_counter() - question_start},
+                    'cached': False
+                }
+        
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+            results = list(executor.map(run, questions))
+        unique_searches = len(batch_searches)
+        
+        total_queries = sum(len(result['queries']) for result in results)
+        print(f"📦 Batch complete: {len(questions)} questions in {time.perf_counter() - start:.1f}s, "
+              f"{unique_searches} unique searches for {total_queries} queries")
+        
+        return results
 
 
 def main():
@@ -0,0 +1,142 @@
+import hashlib
+import random
+import re
+from typing import Dict, Any, List, Set, Tuple
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+
+# Query parameters that only track where a click came from
+TRACKING_PARAMS = {"fbclid", "gclid", "dclid", "msclkid", "mc_cid", "mc_eid", "ref", "ref_src", "igshid"}
+
+# Large prime for the MinHash permutations (2^61 - 1)
+_PRIME = (1 << 61) - 1
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    Reduce a URL to a canonical form so trivially different links compare equal.
+
+    Lowercases the scheme and host, drops "www.", default ports, fragments,
+    tracking parameters (utm_*, fbclid, ...) and trailing slashes, and sorts
+    the remaining query parameters.
+    """
+    if not url:
+        return ""
+
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower() or "http"
+    if scheme == "http":
+        scheme = "https"  # Same page served over both
+
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+
+    path = re.sub(r"/+", "/", parts.path).rstrip("/")
+    query = urlencode(sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in TRACKING_PARAMS
+    ))
+
+    return urlunsplit((scheme, host, path, query, ""))
+
+
+def shingles(text: str, size: int = 3) -> Set[int]:
+    """Hash every run of `size` consecutive words in the text (word shingles)."""
+    words = re.findall(r"\w+", text.lower())
+    if len(words) < size:
+        words = [" ".join(words)] if words else []
+        size = 1
+
+    return {
+        int.from_bytes(hashlib.blake2b(" ".join(words[i:i + size]).encode(), digest_size=8).digest(), "big")
+        for i in range(len(words) - size + 1)
+    }
+
+
+class MinHasher:
+    """Estimates Jaccard similarity between shingle sets with fixed-size signatures."""
+
+    def __init__(self, num_perm: int = 64, seed: int = 1):
+        rng = random.Random(seed)
+        self.permutations = [(rng.randrange(1, _PRIME), rng.randrange(0, _PRIME)) for _ in range(num_perm)]
+
+    def signature(self, shingle_set: Set[int]) -> Tuple[int, ...]:
+        if not shingle_set:
+            return ()
+        return tuple(min((a * x + b) % _PRIME for x in shingle_set) for a, b in self.permutations)
+
+    @staticmethod
+    def similarity(sig_a: Tuple[int, ...], sig_b: Tuple[int, ...]) -> float:
+        if not sig_a or not sig_b:
+            return 0.0
+        return sum(a == b for a, b in zip(sig_a, sig_b)) / len(sig_a)
+
+
+def source_size(source: Dict[str, Any]) -> int:
+    """Number of characters a source contributes to the summarization prompt."""
+    return len(source.get('title', '')) + len(source.get('body', '')) + len(source.get('url', ''))
+
+
+def dedup_sources(sources: List[Dict[str, Any]], threshold: float = 0.8,
+                  num_perm: int = 64) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+    """
+    Collapse duplicate search results before they are sent to the LLM.
+
+    A source is a duplicate if its canonical URL was already seen, or if its
+    body is a near-copy (estimated Jaccard similarity >= threshold) of a kept
+    source. The first occurrence is kept, and the 'query' tags of the sources
+    collapsed into it are merged into its 'queries' list.
+
+    Args:
+        sources: Search results in arrival order
+        threshold: MinHash similarity above which two bodies count as duplicates
+        num_perm: Number of MinHash permutations (higher = more accurate)
+
+    Returns:
+        Tuple of (deduplicated sources, stats dict with the characters and
+        approximate tokens saved)
+    """
+    hasher = MinHasher(num_perm=num_perm)
+    kept = []
+    signatures = []
+    by_url = {}
+    chars_saved = 0
+
+    for source in sources:
+        source = dict(source)
+        source.setdefault('queries', [source['query']] if source.get('query') else [])
+
+        url = canonicalize_url(source.get('url', ''))
+        signature = hasher.signature(shingles(source.get('body', '')))
+
+        duplicate_of = by_url.get(url) if url else None
+        if duplicate_of is None:
+            for position, kept_signature in enumerate(signatures):
+                if hasher.similarity(signature, kept_signature) >= threshold:
+                    duplicate_of = position
+                    break
+
+        if duplicate_of is None:
+            if url:
+                by_url[url] = len(kept)
+            kept.append(source)
+            signatures.append(signature)
+            continue
+
+        original = kept[duplicate_of]
+        for query in source['queries']:
+            if query not in original['queries']:
+                original['queries'].append(query)
+        chars_saved += source_size(source)
+
+    stats = {
+        'input_sources': len(sources),
+        'output_sources': len(kept),
+        'duplicates_removed': len(sources) - len(kept),
+        'chars_saved': chars_saved,
+        'tokens_saved': chars_saved // 4,  # ~4 characters per token for English text
+    }
+    return kept, stats
@@ -4,7 +4,15 @@ Demonstrates various use cases and validates functionality
 """
 
 from smart_research_agent import SmartResearchAgent
+from async_research_agent import AsyncSmartResearchAgent
+from search_cache import SearchCache
+from source_dedup import canonicalize_url, dedup_sources
+from context_packer import pack_context
+from rate_limiter import RateLimiter
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 import os
+import time
 
 
 def test_basic_research():
@@ -105,10 +113,274 @@ def test_multiple_questions():
     print("\n✅ Multiple questions test passed!")
 
 
+def test_concurrent_fetch():
+    """Test that concurrent fetching keeps query order and beats sequential fetching."""
+    print("\n" + "="*80)
+    print("TEST 5: Concurrent Fetch")
+    print("="*80)
+    
+    queries = ["Python programming language", "Rust programming language", "Go programming language"]
+    
+    sequential_agent = SmartResearchAgent(max_concurrency=1)
+    start = time.perf_counter()
+    sequential_agent.fetch_information(queries, results_per_query=2)
+    sequential_time = time.perf_counter() - start
+    
+    concurrent_agent = SmartResearchAgent(max_concurrency=3)
+    start = time.perf_counter()
+    concurrent_results = concurrent_agent.fetch_information(queries, results_per_query=2)
+    concurrent_time = time.perf_counter() - start
+    
+    print(f"\nSequential: {sequential_time:.2f}s, Concurrent: {concurrent_time:.2f}s")
+    
+    # Results must be grouped in the same order as the queries
+    seen_queries = [r['query'] for r in concurrent_results]
+    assert seen_queries == sorted(seen_queries, key=queries.index)
+    assert len(concurrent_results) > 0
+    
+    print("\n✅ Concurrent fetch test passed!")
+
+
+def test_async_research():
+    """Test the asyncio agent with several questions in one event loop."""
+    print("\n" + "="*80)
+    print("TEST 6: Async Research")
+    print("="*80)
+    
+    questions = ["What is machine learning?", "How does blockchain work?"]
+    
+    async def run():
+        async with AsyncSmartResearchAgent() as agent:
+            return await asyncio.gather(
+                *(agent.research(q, num_queries=1, results_per_query=2) for q in questions)
+            )
+    
+    results = asyncio.run(run())
+    
+    for question, result in zip(questions, results):
+        assert result['question'] == question
+        assert set(result) >= {'question', 'queries', 'answer', 'sources'}
+    
+    print("\n✅ Async research test passed!")
+
+
+def test_search_cache():
+    """Test that a shared cache serves repeated and near-repeated queries."""
+    print("\n" + "="*80)
+    print("TEST 7: Search Cache")
+    print("="*80)
+    
+    cache = SearchCache(max_entries=100, ttl_seconds=600)
+    first_agent = SmartResearchAgent(cache=cache)
+    second_agent = SmartResearchAgent(cache=cache)
+    
+    first = first_agent.search_web("Python programming language", max_results=3)
+    second = second_agent.search_web("python  programming language?", max_results=3)
+    
+    stats = cache.stats()
+    print(f"\nCache stats: {stats}")
+    
+    if first:
+        assert second == first
+        assert stats['hits'] == 1
+    assert stats['misses'] == 1
+    
+    # Reordered words can change the meaning, so they must not share an entry
+    assert cache.make_key("convert int to str", 3) != cache.make_key("convert str to int", 3)
+    assert cache.make_key("new york to paris flights", 3) != cache.make_key("paris to new york flights", 3)
+    assert cache.make_key("Convert INT, to str!", 3) == cache.make_key("convert int to str", 3)
+    
+    print("\n✅ Search cache test passed!")
+
+
+def test_source_dedup():
+    """Test URL canonicalization and near-duplicate collapsing."""
+    print("\n" + "="*80)
+    print("TEST 8: Source Deduplication")
+    print("="*80)
+    
+    snippet = "Quantum computers use qubits that can represent both 0 and 1 at the same time"
+    sources = [
+        {'title': 'A', 'body': snippet, 'url': 'https://example.com/quantum', 'query': 'q1'},
+        {'title': 'A', 'body': 'Other text', 'url': 'http://www.example.com/quantum/?utm_source=x', 'query': 'q2'},
+        {'title': 'B', 'body': snippet + ".", 'url': 'https://mirror.net/copy', 'query': 'q3'},
+        {'title': 'C', 'body': 'Photosynthesis turns light into chemical energy', 'url': 'https://bio.org', 'query': 'q1'},
+    ]
+    
+    deduped, stats = dedup_sources(sources)
+    
+    print(f"\nDedup stats: {stats}")
+    
+    assert canonicalize_url('http://www.example.com/quantum/?utm_source=x') == canonicalize_url('https://example.com/quantum')
+    assert [s['title'] for s in deduped] == ['A', 'C']
+    assert deduped[0]['queries'] == ['q1', 'q2', 'q3']
+    assert stats['duplicates_removed'] == 2
+    assert stats['chars_saved'] > 0
+    
+    print("\n✅ Source deduplication test passed!")
+
+
+def test_context_packing():
+    """Test that packing respects the budget and ranks relevant sources first."""
+    print("\n" + "="*80)
+    print("TEST 9: Context Packing")
+    print("="*80)
+    
+    sources = [
+        {'title': 'Cars', 'body': 'Cars drive on roads. ' * 40, 'url': 'https://cars.com'},
+        {'title': 'Plants', 'body': 'Photosynthesis converts light into chemical energy. ' * 40, 'url': 'https://bio.org'},
+        {'title': 'Weather', 'body': 'Rain falls from clouds. ' * 40, 'url': 'https://weather.com'},
+    ]
+    
+    packed, stats = pack_context("How does photosynthesis work?", sources, max_tokens=300)
+    
+    print(f"\nContext stats: {stats}")
+    
+    assert packed[0]['title'] == 'Plants'
+    assert stats['used_tokens'] <= 300
+    assert all(s['body'].endswith('.') for s in packed)
+    
+    print("\n✅ Context packing test passed!")
+
+
+def test_streaming_research():
+    """Test that research_stream emits progress, tokens, and the final result."""
+    print("\n" + "="*80)
+    print("TEST 10: Streaming Research")
+    print("="*80)
+    
+    agent = SmartResearchAgent()
+    question = "What is machine learning?"
+    
+    event_types = []
+    tokens = []
+    result = None
+    start = time.perf_counter()
+    first_token_time = None
+    
+    for event in agent.research_stream(question, num_queries=1, results_per_query=2):
+        event_types.append(event['type'])
+        if event['type'] == 'token':
+            if first_token_time is None:
+                first_token_time = time.perf_counter() - start
+            tokens.append(event['text'])
+        elif event['type'] == 'result':
+            result = event['result']
+    
+    total_time = time.perf_counter() - start
+    print(f"\nTime to first token: {first_token_time:.2f}s, total: {total_time:.2f}s")
+    
+    assert event_types[0] == 'status'
+    assert event_types[-1] == 'result'
+    assert 'queries' in event_types and 'sources' in event_types
+    assert len(tokens) > 0
+    assert result['answer'] == "".join(tokens).strip()
+    
+    print("\n✅ Streaming research test passed!")
+
+
+def test_batch_research():
+    """Test research_many with overlapping questions and a shared rate limit."""
+    print("\n" + "="*80)
+    print("TEST 11: Batch Research")
+    print("="*80)
+    
+    agent = SmartResearchAgent(llm_limiter=RateLimiter(5), search_limiter=RateLimiter(2))
+    questions = [
+        "What is artificial intelligence?",
+        "What is artificial intelligence?",
+        "How does blockchain work?"
+    ]
+    
+    results = agent.research_many(questions, concurrency=3, num_queries=1, results_per_query=2)
+    
+    assert [r['question'] for r in results] == questions
+    for result in results:
+        print(f"\n{result['question']}: {result['timings'].get('total_seconds', 0):.2f}s")
+        assert 'error' not in result
+        assert result['timings']['total_seconds'] > 0
+    
+    # Overlapping batches on one agent keep their shared searches apart
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        batches = list(executor.map(
+            lambda qs: agent.research_many(qs, concurrency=2, num_queries=1, results_per_query=2),
+            [questions[:2], questions[2:]]
+        ))
+    assert [[r['question'] for r in batch] for batch in batches] == [questions[:2], questions[2:]]
+    assert all('error' not in r for batch in batches for r in batch)
+    
+    # Agents without limiters of their own share the process-wide ones
+    default_agent = SmartResearchAgent()
+    assert default_agent.llm_limiter is SmartResearchAgent().llm_limiter
+    assert default_agent.search_limiter is not None
+    
+    # A failed question has the same keys as a successful one
+    research_events = default_agent._research_events
+    
+    def failing_events(question, *args, **kwargs):
+        if question == "fail":
+            raise RuntimeError("search backend down")
+        return research_events(question, *args, **kwargs)
+    
+    default_agent._research_events = failing_events
+    ok, failed = default_agent.research_many([questions[0], "fail"], num_queries=1, results_per_query=2)
+    assert failed['error'] == "search backend down"
+    assert set(failed) - {'error'} == set(ok)
+    assert failed['timings']['total_seconds'] >= 0
+    
+    print("\n✅ Batch research test passed!")
+
+
+def test_speculative_research():
+    """Test speculative search and the short-question fast path."""
+    print("\n" + "="*80)
+    print("TEST 12: Speculative Search")
+    print("="*80)
+    
+    agent = SmartResearchAgent(speculative=True, fast_path_max_words=2)
+    
+    question = "How do neural networks learn from data?"
+    result = agent.research(question, num_queries=2, results_per_query=2)
+    print(f"\nTimings: {result['timings']}")
+    
+    assert result['queries'][0] == question
+    assert result['timings']['hidden_seconds'] >= 0
+    
+    result = agent.research("photosynthesis", num_queries=2, results_per_query=2)
+    assert result['queries'] == ["photosynthesis"]
+    assert result['timings']['fast_path']
+    
+    print("\n✅ Speculative search test passed!")
+
+
+def test_answer_cache():
+    """Test that a paraphrased question is answered from the semantic cache."""
+    print("\n" + "="*80)
+    print("TEST 13: Semantic Answer Cache")
+    print("="*80)
+    
+    # Needs sentence-transformers and faiss-cpu
+    from answer_cache import SemanticAnswerCache
+    
+    cache = SemanticAnswerCache(similarity_threshold=0.85)
+    agent = SmartResearchAgent(answer_cache=cache)
+    
+    first = agent.research("What is machine learning?", num_queries=1, results_per_query=2)
+    second = agent.research("what is machine learning", num_queries=1, results_per_query=2)
+    
+    print(f"\nCache stats: {cache.stats()}")
+    
+    assert not first['cached']
+    assert second['cached']
+    assert second['answer'] == first['answer']
+    
+    print("\n✅ Semantic answer cache test passed!")
+
+
 def test_error_handling():
     """Test error handling with invalid inputs."""
     print("\n" + "="*80)
-    print("TEST 5: Error Handling")
+    print("TEST 14: Error Handling")
     print("="*80)
     
     try:
@@ -162,6 +434,15 @@ def main():
         test_query_generation()
         test_search_functionality()
         test_multiple_questions()
+        test_concurrent_fetch()
+        test_async_research()
+        test_search_cache()
+        test_source_dedup()
+        test_context_packing()
+        test_streaming_research()
+        test_batch_research()
+        test_speculative_research()
+        test_answer_cache()
         
         # Display a full result
         display_full_result(result)
@@ -0,0 +1,91 @@
+import argparse
+import sys
+import time
+
+import faiss
+import numpy as np
+
+from memory_index import INDEX_TYPES, MemoryIndex
+from text_store import TextStore
+
+
+def make_vectors(n, dim, n_clusters=100, noise=0.3, seed=0):
+    """
+    Clustered unit vectors, a rough stand-in for sentence embeddings
+    (uniform random vectors have no structure for ANN indexes to use)
+    """
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((n_clusters, dim)).astype("float32")
+    vectors = centers[rng.integers(n_clusters, size=n)] + noise * rng.standard_normal((n, dim)).astype("float32")
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def make_texts(n, chars=80):
+    """Memory-sized sentences for comparing text storage"""
+    return [f"Memory {i}: user mentioned a preference about topic {i % 997}".ljust(chars, ".") for i in range(n)]
+
+
+def index_bytes(index: MemoryIndex) -> int:
+    """Serialized size, close to the index's RAM footprint"""
+    return faiss.serialize_index(index.index).nbytes
+
+
+def recall_at_k(found, truth):
+    """Share of the true top-k neighbours that the index returned"""
+    hits = sum(len(set(f) & set(t)) for f, t in zip(found, truth))
+    return hits / truth.size
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark memory index types against flat search")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--dim", type=int, default=384, help="all-MiniLM-L6-v2 has 384 dims")
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--types", nargs="+", default=INDEX_TYPES, choices=INDEX_TYPES)
+    parser.add_argument("--nprobe", type=int, default=16)
+    parser.add_argument("--ef-search", type=int, default=128)
+    parser.add_argument("--text-chars", type=int, default=80, help="length of the synthetic memory texts")
+    args = parser.parse_args()
+
+    print(f"{'size':>10} {'index':>12} {'build s':>8} {'B/memory':>9} {'recall@' + str(args.k):>9} "
+          f"{'QPS':>9} {'ms/query':>9}")
+    for size in args.sizes:
+        # Queries come from the same distribution as the stored memories
+        data = make_vectors(size + args.queries, args.dim)
+        vectors, queries = data[:size], data[size:]
+        truth = None
+
+        for index_type in ["flat"] + [t for t in args.types if t != "flat"]:
+            start = time.time()
+            index = MemoryIndex(args.dim, index_type, upgrade_at=0, nprobe=args.nprobe, ef_search=args.ef_search)
+            index.add(vectors)
+            build_seconds = time.time() - start
+
+            # Batched throughput
+            start = time.time()
+            _, found = index.search(queries, args.k)
+            qps = len(queries) / (time.time() - start)
+
+            # Single-query latency, the case an agent turn actually hits
+            start = time.time()
+            for query in queries[:100]:
+                index.search(query[None, :], args.k)
+            latency_ms = (time.time() - start) / min(100, len(queries)) * 1000
+
+            if truth is None:
+                truth = found  # Flat search is exact
+            if index_type in args.types:
+                print(f"{size:>10} {index_type:>12} {build_seconds:>8.2f} {index_bytes(index) / size:>9.1f} "
+                      f"{recall_at_k(found, truth):>9.3f} {qps:>9.0f} {latency_ms:>9.3f}")
+
+        # Texts: a list of Python strings vs one contiguous buffer + offsets
+        texts = make_texts(size, args.text_chars)
+        list_bytes = sys.getsizeof(texts) + sum(sys.getsizeof(text) for text in texts)
+        store = TextStore(texts)
+        print(f"{size:>10} {'texts':>12}  list[str] {list_bytes / size:.1f} B/memory · "
+              f"TextStore {store.nbytes / size:.1f} B/memory")
+
+
+if __name__ == "__main__":
+    main()
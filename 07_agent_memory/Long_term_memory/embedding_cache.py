@@ -0,0 +1,123 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+class EmbeddingCache:
+    """
+    LRU cache of embeddings keyed on a hash of the model name and the text
+
+    Duplicate memories and repeated queries are encoded once. Keys are
+    16-byte BLAKE2 digests, so the cache never holds the texts themselves.
+    Can be saved to and loaded from a .npz file, and shared between memory
+    objects that use the same embedding model. Thread-safe.
+
+    model_name: the embedding model the vectors come from. None ties the
+    cache to the model of the first memory object using it (see bind), or
+    to the one of the file it is loaded from. Loading a file saved for
+    another model raises ValueError.
+    """
+
+    def __init__(self, max_entries: int = 100_000, path: str = None, model_name: str = None):
+        self.max_entries = max_entries
+        self.path = path
+        self.model_name = model_name
+        self._entries: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        if path and os.path.exists(path):
+            self.load(path)
+
+    def bind(self, model_name: str):
+        """Ties an empty, unnamed cache to model_name; raises ValueError if it holds another model's vectors"""
+        with self._lock:
+            if self.model_name is None and not self._entries:
+                self.model_name = model_name
+        if self.model_name != model_name:
+            raise ValueError(f"Embedding cache holds {self.model_name} embeddings, not {model_name}")
+
+    def key(self, text: str) -> bytes:
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update((self.model_name or "").encode("utf-8") + b"\0")
+        digest.update(text.encode("utf-8"))
+        return digest.digest()
+
+    def encode(self, texts, encode_fn) -> np.ndarray:
+        """
+        Embeds texts, calling encode_fn only for the ones not cached yet
+
+        encode_fn gets the list of missing (deduplicated) texts in one call
+        and must return their embeddings as a 2D array.
+        """
+        keys = [self.key(text) for text in texts]
+        found = {}
+        missing = {}
+
+        with self._lock:
+            for key, text in zip(keys, texts):
+                vector = self._entries.get(key)
+                if vector is not None:
+                    self._entries.move_to_end(key)
+                    found[key] = vector
+                    self.hits += 1
+                else:
+                    missing.setdefault(key, text)
+                    self.misses += 1
+
+        if missing:
+            vectors = np.asarray(encode_fn(list(missing.values()))).astype("float32")
+            with self._lock:
+                for key, vector in zip(missing, vectors):
+                    found[key] = vector
+                    self._entries[key] = vector
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+
+        return np.stack([found[key] for key in keys]) if keys else np.zeros((0, 0), dtype="float32")
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+            }
+
+    def save(self, path: str = None):
+        path = path or self.path
+        if not path:
+            raise ValueError("No path given to save the embedding cache to")
+
+        with self._lock:
+            # Raw bytes: an "S16" array would strip trailing zero bytes from the digests
+            keys = np.frombuffer(b"".join(self._entries), dtype="uint8").reshape(-1, 16)
+            vectors = np.stack(list(self._entries.values())) if self._entries else np.zeros((0, 0), "float32")
+
+        # Through a file object, so np.savez doesn't append ".npz" to the path
+        with open(path, "wb") as f:
+            np.savez(f, keys=keys, vectors=vectors, model_name=np.array(self.model_name or ""))
+
+    def load(self, path: str = None):
+        """Replaces the entries with the ones saved at path; raises ValueError if they are another model's"""
+        path = path or self.path
+        with np.load(path) as data:
+            model_name = str(data["model_name"]) if "model_name" in data.files else ""
+            entries = OrderedDict(zip((row.tobytes() for row in data["keys"]), data["vectors"]))
+
+        if self.model_name is None:
+            self.model_name = model_name or None
+        elif model_name != self.model_name:
+            raise ValueError(f"Embedding cache {path} holds {model_name or 'unnamed model'} embeddings, "
+                             f"not {self.model_name}")
+
+        with self._lock:
+            self._entries = entries
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
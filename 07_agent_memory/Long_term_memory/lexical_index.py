@@ -0,0 +1,125 @@
+import math
+import re
+from collections import Counter, defaultdict
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "do", "does", "for", "from", "how",
+    "in", "is", "it", "of", "on", "or", "that", "the", "this", "to", "was", "what",
+    "when", "where", "which", "who", "why", "with",
+}
+
+
+def tokenize(text: str):
+    """Lowercase word tokens without stopwords"""
+    return [word for word in re.findall(r"\w+", text.lower()) if word not in STOPWORDS]
+
+
+class LexicalIndex:
+    """
+    Inverted index with BM25 scoring
+
+    Each term maps to the ids of the memories containing it (and how often),
+    so a query only reads the postings of its own terms. Catches exact names,
+    numbers and rare words that embeddings tend to blur.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings = defaultdict(dict)  # term -> {memory id: count}
+        self.lengths = {}                  # memory id -> number of tokens
+        self.total_length = 0
+
+    def __len__(self):
+        return len(self.lengths)
+
+    def add(self, memory_id: int, text: str):
+        tokens = tokenize(text)
+        for term, count in Counter(tokens).items():
+            self.postings[term][memory_id] = count
+        self.lengths[memory_id] = len(tokens)
+        self.total_length += len(tokens)
+
+    def remove(self, memory_id: int, text: str):
+        """Removes a memory (text is needed to find its postings)"""
+        if memory_id not in self.lengths:
+            return
+        for term in set(tokenize(text)):
+            postings = self.postings.get(term)
+            if postings is not None:
+                postings.pop(memory_id, None)
+                if not postings:
+                    del self.postings[term]
+        self.total_length -= self.lengths.pop(memory_id)
+
+    def search(self, query: str, k: int, allowed=None, corpus=None):
+        """
+        Top-k (memory id, BM25 score) pairs, best first
+
+        allowed: optional set of memory ids; other ids are skipped
+        corpus: optional (number of documents, average length, {term: document
+        frequency}) to score against instead of this index's own statistics
+        (see search_many)
+        """
+        if not self.lengths:
+            return []
+
+        terms = set(tokenize(query))
+        if corpus is None:
+            n = len(self.lengths)
+            average_length = self.total_length / n or 1
+            frequencies = {term: len(self.postings.get(term, ())) for term in terms}
+        else:
+            n, average_length, frequencies = corpus
+        scores = defaultdict(float)
+
+        for term in terms:
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            frequency = frequencies[term]
+            idf = math.log(1 + (n - frequency + 0.5) / (frequency + 0.5))
+            for memory_id, count in postings.items():
+                if allowed is not None and memory_id not in allowed:
+                    continue
+                length_norm = 1 - self.b + self.b * self.lengths[memory_id] / average_length
+                scores[memory_id] += idf * count * (self.k1 + 1) / (count + self.k1 * length_norm)
+
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+
+
+def search_many(indexes, query: str, k: int, allowed=None):
+    """
+    Top-k (memory id, BM25 score) pairs over several indexes (e.g. one per user)
+
+    IDF and average length are computed over all of them together, so a
+    rare term in one index scores the same as in another and the scores can
+    be ranked against each other.
+    """
+    indexes = [index for index in indexes if len(index)]
+    if not indexes:
+        return []
+
+    n = sum(len(index) for index in indexes)
+    average_length = sum(index.total_length for index in indexes) / n or 1
+    frequencies = {term: sum(len(index.postings.get(term, ())) for index in indexes)
+                   for term in set(tokenize(query))}
+
+    hits = []
+    for index in indexes:
+        hits += index.search(query, k, allowed, corpus=(n, average_length, frequencies))
+    return sorted(hits, key=lambda hit: hit[1], reverse=True)[:k]
+
+
+def reciprocal_rank_fusion(rankings, c: int = 60):
+    """
+    Merges ranked id lists into one: score(id) = sum of 1 / (c + rank)
+
+    Only ranks are used, so vector distances and BM25 scores (which live on
+    different scales) never have to be normalized against each other.
+    """
+    scores = defaultdict(float)
+    for ranking in rankings:
+        for rank, memory_id in enumerate(ranking, start=1):
+            scores[memory_id] += 1 / (c + rank)
+    return sorted(scores, key=scores.get, reverse=True)
@@ -1,8 +1,131 @@
+import faiss
+import numpy as np
+
+from .lexical_index import LexicalIndex, reciprocal_rank_fusion
+from .memory_index import EXACT_SEARCH_BELOW, MemoryIndex
+
+
 class LongTermMemory:
-    def __init__(self, index, texts):
+    def __init__(self, index, texts, metadata=None):
+        """
+        index: a MemoryIndex, or a plain FAISS index whose vector i belongs
+        to texts[i] (e.g. one saved by vector_store.py)
+        """
         self.index = index
         self.texts = texts
+        # Optional dict per text, e.g. {"user": "alice", "type": "preference"}
+        self.metadata = metadata
+        self.lexical = None
+        # Per metadata key: (code of every text's value, value -> code), built on first filter
+        self._label_codes = {}
+
+    @classmethod
+    def from_embeddings(cls, embeddings, texts, index_type="flat", upgrade_at=50_000, metadata=None):
+        """
+        Builds the index from precomputed embeddings
+
+        index_type: one of INDEX_TYPES in memory_index.py (used once len(texts) >= upgrade_at)
+        """
+        index = MemoryIndex(embeddings.shape[1], index_type, upgrade_at)
+        index.add(embeddings)
+        return cls(index, texts, metadata)
+
+    def retrieve(self, query_embedding, k=1, where=None, query_text=None):
+        """
+        where: only texts whose metadata matches all these key/values
+        query_text: also rank texts by BM25 keyword match and fuse both rankings
+        """
+        fetch = 4 * k if query_text else k
+
+        allowed = self._allowed(where)
+        if allowed is not None and not allowed.any():
+            return []
+
+        distances, indices = self._search(query_embedding, fetch, allowed)
+        found = [int(i) for i in indices[0] if i != -1]
+
+        if query_text:
+            if self.lexical is None:
+                self.lexical = LexicalIndex()
+                for i, text in enumerate(self.texts):
+                    self.lexical.add(i, text)
+            allowed_ids = None if allowed is None else set(np.flatnonzero(allowed).tolist())
+            lexical_hits = [i for i, _ in self.lexical.search(query_text, fetch, allowed_ids)]
+            found = reciprocal_rank_fusion([found, lexical_hits])
+
+        return [self.texts[i] for i in found[:k]]
+
+    def retrieve_many(self, query_embeddings, k=1, where=None, max_distance=None):
+        """
+        Top-k for many queries in one index search
+
+        Returns, per query, a list of (text, distance, index) sorted by L2
+        distance (lower = closer); shorter than k when fewer texts match or
+        lie within max_distance.
+        """
+        query_embeddings = np.asarray(query_embeddings, dtype="float32")
+        allowed = self._allowed(where)
+        if allowed is not None and not allowed.any():
+            return [[] for _ in query_embeddings]
+
+        distances, indices = self._search(query_embeddings, k, allowed)
+        return [
+            [(self.texts[i], float(distance), int(i)) for distance, i in zip(row_distances, row_indices)
+             if i != -1 and (max_distance is None or distance <= max_distance)]
+            for row_distances, row_indices in zip(distances, indices)
+        ]
+
+    def _allowed(self, where):
+        """Boolean mask of the texts whose metadata matches where (None = all)"""
+        if not where:
+            return None
+        allowed = np.ones(len(self.texts), dtype=bool)
+        for key, value in where.items():
+            codes, lookup = self._labels(key)
+            code = lookup.get(value)
+            if code is None:
+                return np.zeros(len(self.texts), dtype=bool)
+            allowed &= codes == code
+        return allowed
+
+    def _labels(self, key):
+        """Every text's value for a metadata key as an int code array, plus value -> code"""
+        if key not in self._label_codes:
+            lookup = {}
+            metadata = self.metadata or [{}] * len(self.texts)
+            codes = np.fromiter((lookup.setdefault(meta.get(key), len(lookup)) for meta in metadata),
+                                dtype="int32", count=len(metadata))
+            self._label_codes[key] = (codes, lookup)
+        return self._label_codes[key]
+
+    def _search(self, query_embeddings, k, allowed):
+        if allowed is None:
+            return self.index.search(query_embeddings, k)
+        if not isinstance(self.index, MemoryIndex):
+            return self._post_filtered_search(query_embeddings, k, allowed)
+        if allowed.sum() < EXACT_SEARCH_BELOW:
+            return self.index.search_subset(query_embeddings, k, np.flatnonzero(allowed))
+        selector = faiss.IDSelectorBitmap(np.packbits(allowed, bitorder="little"))
+        return self.index.search(query_embeddings, k, selector)
+
+    def _post_filtered_search(self, query_embeddings, k, allowed):
+        """
+        Filtered top-k on a plain FAISS index, which has no id lookups or
+        selectors to filter with: searches unfiltered, drops the texts that
+        don't match and searches 4x deeper until every query has k matches
+        """
+        fetch = k
+        while True:
+            distances, indices = self.index.search(query_embeddings, fetch)
+            keep = (indices != -1) & allowed[np.maximum(indices, 0)]
+            if (keep.sum(axis=1) >= k).all() or fetch >= self.index.ntotal:
+                break
+            fetch *= 4
 
-    def retrieve(self, query_embedding, k=1):
-        distances, indices = self.index.search(query_embedding, k)
-        return [self.texts[i] for i in indices[0]]
+        filtered_distances = np.full((len(indices), k), np.inf, dtype="float32")
+        filtered_indices = np.full((len(indices), k), -1, dtype="int64")
+        for row, (row_distances, row_indices, row_keep) in enumerate(zip(distances, indices, keep)):
+            matches = row_indices[row_keep][:k]
+            filtered_indices[row, :len(matches)] = matches
+            filtered_distances[row, :len(matches)] = row_distances[row_keep][:k]
+        return filtered_distances, filtered_indices
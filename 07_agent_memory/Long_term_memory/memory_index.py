@@ -0,0 +1,509 @@
+import math
+import os
+from typing import Dict
+
+import faiss
+import numpy as np
+
+INDEX_TYPES = ["flat", "ivf", "hnsw", "ivfpq", "fp16", "sq8", "ivfpq_refine"]
+
+# Filters matching fewer vectors than this are better searched exactly (search_subset)
+EXACT_SEARCH_BELOW = 2_000
+
+# Largest log (see MemoryIndex.save) relative to the index file before the file is rewritten
+MAX_LOG_FRACTION = 0.1
+
+
+def create_index(index_type: str, dim: int, n_vectors: int = 0, hnsw_m: int = 32, pq_m: int = None,
+                 refine_k_factor: int = 4):
+    """
+    Builds an empty FAISS index of the given type
+
+    - flat:  exact search, cost grows linearly with the number of vectors
+    - ivf:   vectors bucketed by k-means; search only visits nprobe buckets (needs training)
+    - hnsw:  graph search, no training, more memory per vector
+    - ivfpq: ivf + product quantization, a few bytes per vector (needs training)
+    - fp16:  flat search on float16 vectors, half the memory of flat
+    - sq8:   flat search on 8-bit scalar-quantized vectors, a quarter of the memory (needs training)
+    - ivfpq_refine: ivfpq finds refine_k_factor * k candidates, which are
+      re-ranked on their 8-bit (sq8) vectors (needs training)
+
+    n_vectors sizes the number of IVF buckets (about 4 * sqrt(n), with at
+    least 39 training vectors per bucket as k-means wants).
+    """
+    if index_type == "flat":
+        return faiss.IndexFlatL2(dim)
+
+    if index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, hnsw_m)
+        index.hnsw.efConstruction = 2 * hnsw_m
+        return index
+
+    if index_type == "fp16":
+        return faiss.IndexScalarQuantizer(dim, faiss.ScalarQuantizer.QT_fp16)
+
+    if index_type == "sq8":
+        return faiss.IndexScalarQuantizer(dim, faiss.ScalarQuantizer.QT_8bit)
+
+    nlist = max(1, min(int(4 * math.sqrt(max(n_vectors, 1))), n_vectors // 39))
+    quantizer = faiss.IndexFlatL2(dim)
+
+    if index_type == "ivf":
+        return faiss.IndexIVFFlat(quantizer, dim, nlist)
+
+    if index_type == "ivfpq":
+        pq_m = pq_m or _default_pq_m(dim)
+        return faiss.IndexIVFPQ(quantizer, dim, nlist, pq_m, 8)
+
+    if index_type == "ivfpq_refine":
+        pq_m = pq_m or _default_pq_m(dim)
+        base = faiss.IndexIVFPQ(quantizer, dim, nlist, pq_m, 8)
+        index = faiss.IndexRefine(base, faiss.IndexScalarQuantizer(dim, faiss.ScalarQuantizer.QT_8bit))
+        index.k_factor = refine_k_factor
+        return index
+
+    raise ValueError(f"index_type must be one of {INDEX_TYPES}")
+
+
+def _default_pq_m(dim: int) -> int:
+    """Largest number of sub-quantizers that divides dim with at least 8 dims each"""
+    for m in range(max(1, dim // 8), 0, -1):
+        if dim % m == 0:
+            return m
+    return 1
+
+
+def set_search_params(index, nprobe: int = 16, ef_search: int = 128):
+    """Sets how much of an ANN index a search visits (more = better recall, slower)"""
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        ivf.nprobe = min(nprobe, ivf.nlist)
+
+    hnsw = getattr(faiss.downcast_index(index), "hnsw", None)
+    if hnsw is not None:
+        hnsw.efSearch = ef_search
+
+
+def _with_ids(index):
+    """
+    IVF indexes keep ids in their inverted lists; other types get an IndexIDMap2
+    (an IndexIDMap around IVF would break on removal, as IVF renumbers its vectors)
+
+    Either way vectors can be looked up by id (for IVF through a hash table).
+    """
+    if isinstance(index, faiss.IndexIVF):
+        index.set_direct_map_type(faiss.DirectMap.Hashtable)
+        return index
+    return faiss.IndexIDMap2(index)
+
+
+def _exact_search(queries: np.ndarray, vectors: np.ndarray, ids: np.ndarray, k: int):
+    """Brute-force top-k over a few vectors; pads with -1 like FAISS"""
+    distances = ((queries ** 2).sum(1)[:, None] - 2 * queries @ vectors.T + (vectors ** 2).sum(1)[None, :])
+    order = np.argsort(distances, axis=1, kind="stable")[:, :k]
+    distances = np.take_along_axis(distances, order, axis=1).astype("float32")
+    ids = ids[order]
+
+    missing = k - order.shape[1]
+    if missing > 0:
+        distances = np.pad(distances, ((0, 0), (0, missing)), constant_values=np.inf)
+        ids = np.pad(ids, ((0, 0), (0, missing)), constant_values=-1)
+    return distances, ids
+
+
+def _merge_results(results, n_queries: int, k: int):
+    """Merges per-partition (distances, ids) into one top-k by distance"""
+    if not results:
+        return (np.full((n_queries, k), np.inf, dtype="float32"),
+                np.full((n_queries, k), -1, dtype="int64"))
+    if len(results) == 1:
+        return results[0]
+
+    distances = np.hstack([result[0] for result in results])
+    ids = np.hstack([result[1] for result in results])
+    order = np.argsort(distances, axis=1, kind="stable")[:, :k]
+    return np.take_along_axis(distances, order, axis=1), np.take_along_axis(ids, order, axis=1)
+
+
+class MemoryIndex:
+    """
+    Id-mapped vector index that starts flat and upgrades itself to an ANN index
+
+    Vectors are stored under caller-chosen int64 ids, so they can be removed
+    and replaced (IVF indexes store ids natively, the others are wrapped in
+    faiss.IndexIDMap2). Flat search is exact and needs no training, which is
+    ideal for small stores. Once the store reaches upgrade_at vectors, every
+    vector is read back from the flat index, the target index type is trained
+    on them (a random sample of at most max_training_vectors) and filled under
+    the same ids, and searches switch to it.
+
+    HNSW graphs (and ivfpq_refine) can't delete vectors, so there removed ids
+    are kept as tombstones and filtered out at search time.
+
+    Saved as <path>.faiss plus an append-only log of raw float32 vectors
+    (<path>.vectors) and their ids (<path>.ids), see save(). A loaded index
+    stays memory-mapped until its first write; meanwhile the logged vectors
+    live in a small flat side index (log_index) and every search covers both.
+    """
+
+    def __init__(self, dim: int, index_type: str = "flat", upgrade_at: int = 50_000,
+                 nprobe: int = 16, ef_search: int = 128, max_training_vectors: int = 100_000,
+                 index=None, deleted=None):
+        if index_type not in INDEX_TYPES:
+            raise ValueError(f"index_type must be one of {INDEX_TYPES}")
+
+        self.dim = dim
+        self.index_type = index_type
+        # Product quantization needs at least 256 training vectors (8-bit codes)
+        self.upgrade_at = max(upgrade_at, 256) if index_type.startswith("ivfpq") else upgrade_at
+        self.nprobe = nprobe
+        self.ef_search = ef_search
+        self.max_training_vectors = max_training_vectors
+        self.deleted = set(deleted or ())
+
+        # An existing index can be passed in, e.g. one loaded from disk
+        self.index = index if index is not None else _with_ids(faiss.IndexFlatL2(dim))
+        set_search_params(self.index, nprobe, ef_search)
+
+        # Persistence state, see save()
+        self.path = None           # Where the index was last saved to or loaded from
+        self.mapped = False        # Memory-mapped from path.faiss (read-only)
+        self.log_index = None      # Logged vectors while the index is mapped
+        self.logged = 0            # Vectors in path's log, on top of path.faiss
+        self._unsaved_ids = []     # Ids added since then
+        self._rewrite = True       # Changed in a way the log can't express (removal, rebuild)
+
+    @property
+    def ntotal(self) -> int:
+        return self._stored - len(self.deleted)
+
+    @property
+    def _stored(self) -> int:
+        """Stored vectors, tombstones included"""
+        return self.index.ntotal + (self.log_index.ntotal if self.log_index is not None else 0)
+
+    @property
+    def storage(self):
+        """The index that holds the vectors (inside the IndexIDMap2, if any)"""
+        if isinstance(self.index, faiss.IndexIDMap2):
+            return faiss.downcast_index(self.index.index)
+        return self.index
+
+    def _vectors_and_ids(self):
+        """All stored vectors and their ids (indexes wrapped in IndexIDMap2 only)"""
+        vectors = self.storage.reconstruct_n(0, self.index.ntotal)
+        return vectors, faiss.vector_to_array(self.index.id_map)
+
+    @property
+    def current_type(self) -> str:
+        """Index type currently in use ("flat" until the upgrade)"""
+        index = self.storage
+        if isinstance(index, faiss.IndexRefine):
+            return "ivfpq_refine"
+        if isinstance(index, faiss.IndexScalarQuantizer):
+            return "fp16" if index.sq.qtype == faiss.ScalarQuantizer.QT_fp16 else "sq8"
+        if isinstance(index, faiss.IndexIVFPQ):
+            return "ivfpq"
+        if isinstance(index, faiss.IndexIVF):
+            return "ivf"
+        if isinstance(index, faiss.IndexHNSW):
+            return "hnsw"
+        return "flat"
+
+    def make_writable(self):
+        """
+        Copies a memory-mapped index into RAM (mapped files are read-only)
+        and moves the side index's logged vectors into it
+        """
+        if self.mapped:
+            self.index = faiss.deserialize_index(faiss.serialize_index(self.index))
+            set_search_params(self.index, self.nprobe, self.ef_search)
+            self.mapped = False
+
+        if self.log_index is not None:
+            vectors = self.log_index.index.reconstruct_n(0, self.log_index.ntotal)
+            self.index.add_with_ids(vectors, faiss.vector_to_array(self.log_index.id_map))
+            self.log_index = None
+
+    def add(self, vectors: np.ndarray, ids=None):
+        """Adds vectors under ids (default: the next free positions)"""
+        self.make_writable()
+        if ids is None:
+            ids = np.arange(self.index.ntotal, self.index.ntotal + len(vectors))
+        ids = np.asarray(ids, dtype="int64")
+        self.index.add_with_ids(vectors, ids)
+        self._unsaved_ids.append(ids)
+
+        if self.current_type == "flat" and self.index_type != "flat" and self.ntotal >= self.upgrade_at:
+            self.upgrade()
+
+    def remove(self, ids):
+        ids = np.asarray(ids, dtype="int64")
+        self.make_writable()
+        self._rewrite = True
+        try:
+            self.index.remove_ids(ids)
+        except RuntimeError:
+            self.deleted.update(int(i) for i in ids)  # hnsw, ivfpq_refine: filter at search time
+
+    def compact(self):
+        """Rebuilds the index without its tombstones (hnsw, ivfpq_refine)"""
+        if not self.deleted:
+            return
+
+        self.make_writable()
+        vectors, ids = self._vectors_and_ids()
+        keep = ~np.isin(ids, np.fromiter(self.deleted, dtype="int64"))
+
+        self.index = self._build(self.current_type, vectors[keep], ids[keep])
+        self.deleted = set()
+        self._rewrite = True
+
+    def upgrade(self):
+        """Migrates all vectors from the flat index to an index of type index_type"""
+        vectors, ids = self._vectors_and_ids()
+
+        index = self._build(self.index_type, vectors, ids)
+
+        print(f"⚡ Index upgraded: flat → {self.index_type} ({len(vectors)} vectors)")
+        self.index = index
+        self._rewrite = True
+
+    def _build(self, index_type: str, vectors: np.ndarray, ids: np.ndarray):
+        """A new index of index_type holding vectors under ids, trained on (a sample of) them"""
+        index = create_index(index_type, self.dim, n_vectors=len(vectors))
+        if not index.is_trained:
+            sample = vectors
+            if len(vectors) > self.max_training_vectors:
+                rows = np.random.default_rng(0).choice(len(vectors), self.max_training_vectors, replace=False)
+                sample = vectors[rows]
+            index.train(sample)
+        set_search_params(index, self.nprobe, self.ef_search)
+
+        index = _with_ids(index)
+        index.add_with_ids(vectors, ids)
+        return index
+
+    def save(self, path: str):
+        """
+        Writes <path>.faiss (+ <path>.deleted), or appends to <path>.vectors and <path>.ids
+
+        When saving back to the path the index was saved to or loaded from,
+        and it has only gained vectors since, the new vectors are appended
+        to the log as raw float32 rows instead of rewriting the index file.
+        Removals, compaction and upgrades write the index file in full, and
+        so does a log that would grow past MAX_LOG_FRACTION of it (so
+        rewrites stay amortized O(1) per vector, like a growing array, and
+        the exact search over the log of a mapped index stays small).
+        Tombstones only change along with the index file, so they are
+        written next to it as raw int64 ids (<path>.deleted).
+        """
+        index_path, vectors_path, ids_path = f"{path}.faiss", f"{path}.vectors", f"{path}.ids"
+        new_ids = np.concatenate(self._unsaved_ids) if self._unsaved_ids else np.zeros(0, dtype="int64")
+        logged = self.logged + len(new_ids)
+        incremental = (
+            path == self.path and not self._rewrite and logged <= MAX_LOG_FRACTION * (self._stored - logged)
+            and os.path.exists(index_path)
+            and (os.path.getsize(ids_path) if os.path.exists(ids_path) else 0) == 8 * self.logged
+        )
+
+        if incremental:
+            if len(new_ids):
+                with open(vectors_path, "ab") as f:
+                    f.write(self.index.reconstruct_batch(new_ids).astype("float32").tobytes())
+                with open(ids_path, "ab") as f:
+                    f.write(new_ids.tobytes())
+        else:
+            # The index file holds everything, the side index included
+            self.make_writable()
+            # Write next to the old file and swap, since the old one may be mapped
+            faiss.write_index(self.index, index_path + ".tmp")
+            os.replace(index_path + ".tmp", index_path)
+            for log_path in (vectors_path, ids_path, f"{path}.deleted"):
+                if os.path.exists(log_path):
+                    os.remove(log_path)
+            if self.deleted:
+                np.array(sorted(self.deleted), dtype="int64").tofile(f"{path}.deleted")
+            logged = 0
+
+        self.path = path
+        self.logged = logged
+        self._unsaved_ids = []
+        self._rewrite = False
+
+    @classmethod
+    def load(cls, path: str, dim: int, index_type: str = "flat", upgrade_at: int = 50_000,
+             deleted=None, logged: int = 0, mmap: bool = True, **index_kwargs) -> "MemoryIndex":
+        """
+        Loads an index written by save(); logged is the number of log rows to replay
+
+        With mmap=True, flat, HNSW and PQ vectors are memory-mapped (IVF
+        lists are read into RAM) and logged vectors go into a flat side
+        index searched along with it, until the first write copies the
+        index into RAM. With mmap=False they are added to the index directly.
+
+        deleted: tombstone ids, by default read from <path>.deleted
+        """
+        if deleted is None and os.path.exists(f"{path}.deleted"):
+            deleted = np.fromfile(f"{path}.deleted", dtype="int64").tolist()
+        index = faiss.read_index(f"{path}.faiss", faiss.IO_FLAG_MMAP_IFC if mmap else 0)
+        memory_index = cls(dim, index_type, upgrade_at, index=index, deleted=deleted, **index_kwargs)
+
+        if logged:
+            vectors = np.memmap(f"{path}.vectors", dtype="float32", mode="r", shape=(logged, dim))
+            ids = np.fromfile(f"{path}.ids", dtype="int64", count=logged)
+            if mmap:
+                memory_index.log_index = _with_ids(faiss.IndexFlatL2(dim))
+                target = memory_index.log_index
+            else:
+                target = memory_index.index
+            target.add_with_ids(np.ascontiguousarray(vectors), ids)
+
+        memory_index.path = path
+        memory_index.mapped = mmap
+        memory_index.logged = logged
+        memory_index._rewrite = False
+        return memory_index
+
+    def search(self, queries: np.ndarray, k: int, selector=None):
+        """
+        Top-k search; returns (distances, ids) with id -1 where fewer than k match
+
+        selector: optional faiss.IDSelector restricting which ids can be returned
+        """
+        if self.deleted:
+            tombstones = faiss.IDSelectorNot(faiss.IDSelectorBatch(np.array(sorted(self.deleted), dtype="int64")))
+            selector = tombstones if selector is None else faiss.IDSelectorAnd(selector, tombstones)
+
+        if selector is None:
+            results = [self.index.search(queries, k)]
+        else:
+            results = [self.index.search(queries, k, params=self._search_params(selector))]
+
+        if self.log_index is not None:
+            params = None
+            if selector is not None:
+                params = faiss.SearchParameters()
+                params.sel = selector
+            results.append(self.log_index.search(queries, k, params=params))
+        return _merge_results(results, len(queries), k)
+
+    def search_subset(self, queries: np.ndarray, k: int, ids):
+        """
+        Exact top-k among the given (live) ids only
+
+        For filters that match few vectors: an ANN search with a selective
+        filter can miss matches (the graph or the probed buckets hold few of
+        them), while looking the vectors up and comparing them all is both
+        exact and cheap.
+        """
+        ids = np.asarray(ids, dtype="int64")
+        if not len(ids):
+            return _merge_results([], len(queries), k)
+        return _exact_search(queries, self.reconstruct(ids), ids, k)
+
+    def reconstruct(self, ids) -> np.ndarray:
+        """The stored vectors of ids, looked up in the side index for logged ones"""
+        ids = np.asarray(ids, dtype="int64")
+        if self.log_index is None:
+            return self.index.reconstruct_batch(ids)
+
+        logged = np.isin(ids, faiss.vector_to_array(self.log_index.id_map))
+        vectors = np.empty((len(ids), self.dim), dtype="float32")
+        if logged.any():
+            vectors[logged] = self.log_index.reconstruct_batch(ids[logged])
+        if not logged.all():
+            vectors[~logged] = self.index.reconstruct_batch(ids[~logged])
+        return vectors
+
+    def _search_params(self, selector):
+        index_type = self.current_type
+        if index_type == "ivfpq_refine":
+            # IndexRefine only hands its base index's selector on, and the
+            # IndexIDMap2 around it doesn't translate that one to internal ids
+            base = faiss.SearchParametersIVF()
+            base.nprobe = faiss.extract_index_ivf(self.storage).nprobe
+            base.sel = faiss.IDSelectorTranslated(self.index.id_map, selector)
+            params = faiss.IndexRefineSearchParameters()
+            params.k_factor = self.storage.k_factor
+            params.base_index_params = base
+            params.referenced_objects = [base, base.sel, selector]  # SWIG doesn't keep them alive
+            return params
+
+        if index_type in ("ivf", "ivfpq"):
+            params = faiss.SearchParametersIVF()
+            params.nprobe = self.storage.nprobe
+        elif index_type == "hnsw":
+            params = faiss.SearchParametersHNSW()
+            params.efSearch = self.storage.hnsw.efSearch
+        else:
+            params = faiss.SearchParameters()
+        params.sel = selector
+        return params
+
+
+class PartitionedIndex:
+    """
+    One MemoryIndex per partition key (e.g. per user)
+
+    A search scoped to some partitions only touches their vectors, so a
+    tenant's recall cost grows with that tenant's memories rather than with
+    the whole store. Each partition starts flat and upgrades on its own once
+    it reaches upgrade_at vectors.
+    """
+
+    def __init__(self, dim: int, index_type: str = "flat", upgrade_at: int = 50_000, **index_kwargs):
+        self.dim = dim
+        self.index_type = index_type
+        self.upgrade_at = upgrade_at
+        self.index_kwargs = index_kwargs
+        self.partitions: Dict[int, MemoryIndex] = {}
+
+    @property
+    def ntotal(self) -> int:
+        return sum(partition.ntotal for partition in self.partitions.values())
+
+    def partition(self, key: int) -> MemoryIndex:
+        """The index of a partition, created on first use"""
+        if key not in self.partitions:
+            self.partitions[key] = MemoryIndex(self.dim, self.index_type, self.upgrade_at, **self.index_kwargs)
+        return self.partitions[key]
+
+    def add(self, vectors: np.ndarray, ids, keys):
+        ids = np.asarray(ids, dtype="int64")
+        keys = np.asarray(keys)
+        for key in np.unique(keys):
+            rows = keys == key
+            self.partition(int(key)).add(vectors[rows], ids[rows])
+
+    def remove(self, ids, keys):
+        ids = np.asarray(ids, dtype="int64")
+        keys = np.asarray(keys)
+        for key in np.unique(keys):
+            self.partitions[int(key)].remove(ids[keys == key])
+
+    def compact(self):
+        """Rebuilds partitions that hold more tombstones than live vectors"""
+        for partition in self.partitions.values():
+            if len(partition.deleted) > partition.ntotal:
+                partition.compact()
+
+    def search(self, queries: np.ndarray, k: int, keys=None, selector=None):
+        """
+        Top-k search over the given partitions (default: all of them)
+
+        Per-partition results are merged by distance; returns (distances, ids)
+        with id -1 where fewer than k match.
+        """
+        keys = self.partitions if keys is None else keys
+        results = [self.partitions[key].search(queries, k, selector)
+                   for key in keys if key in self.partitions and self.partitions[key].ntotal]
+        return _merge_results(results, len(queries), k)
+
+    def search_subset(self, queries: np.ndarray, k: int, ids, keys):
+        """Exact top-k among the given ids (keys: the partition of each id)"""
+        ids = np.asarray(ids, dtype="int64")
+        keys = np.asarray(keys)
+        results = [self.partitions[int(key)].search_subset(queries, k, ids[keys == key])
+                   for key in np.unique(keys)]
+        return _merge_results(results, len(queries), k)
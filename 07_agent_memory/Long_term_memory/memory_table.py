@@ -0,0 +1,199 @@
+import json
+import os
+from array import array
+
+import numpy as np
+
+# One row per memory id; a fixed-size record instead of a dict per memory
+FIELDS = [
+    ("pos", "i8"),            # Position of the text in the TextStore
+    ("created_at", "f8"),
+    ("last_access", "f8"),    # Last time the memory was added, merged into or recalled
+    ("importance", "f4"),
+    ("user", "i4"),           # Label codes, see MemoryTable.labels (0 = none)
+    ("type", "i4"),
+    ("alive", "?"),           # False once removed or evicted
+]
+
+
+class MemoryTable:
+    """
+    Per-memory bookkeeping stored as one numpy record array
+
+    Row i belongs to memory id i. Ids are never reused, so removed memories
+    keep their row with alive=False. String metadata (user, type) is stored
+    as small integer codes into the labels lists. The ids of every user's
+    memories are also kept in a list per user, so filters scoped to one user
+    only read that user's rows.
+
+    Rows are changed through set() and remove(), which remember them, so
+    saving again only writes the changed and the new rows (see save()).
+    """
+
+    def __init__(self, rows=None, labels=None):
+        self.rows = rows if rows is not None else np.zeros(1024, dtype=FIELDS)
+        self.size = 0 if rows is None else len(rows)
+        # Running count of live rows, so len() never scans the table
+        self.alive_count = 0 if rows is None else int(rows["alive"].sum())
+
+        self._user_ids = {}   # user code -> array of ids (removed ones are dropped lazily)
+        if rows is not None:
+            live = np.flatnonzero(rows["alive"])
+            users = rows["user"][live]
+            order = np.argsort(users, kind="stable")
+            for group in np.split(live[order], np.flatnonzero(np.diff(users[order])) + 1):
+                if len(group):
+                    self._user_ids[int(rows["user"][group[0]])] = array("q", group.astype("int64").tobytes())
+        self.labels = labels or {"user": [None], "type": [None]}
+        self._codes = {field: {label: code for code, label in enumerate(values)}
+                       for field, values in self.labels.items()}
+
+        # Persistence state, see save()
+        self.path = None                 # Where the table was last saved to or loaded from
+        self._saved_size = 0             # Rows in path.rows
+        self._saved_labels = {}          # Number of labels per field in path.labels.json
+        self._dirty = set()              # Ids of saved rows changed since then
+
+    def __len__(self):
+        return self.size
+
+    def code(self, field: str, label) -> int:
+        """Code of a user/type label, registering new labels"""
+        codes = self._codes[field]
+        if label not in codes:
+            codes[label] = len(self.labels[field])
+            self.labels[field].append(label)
+        return codes[label]
+
+    def find_code(self, field: str, label):
+        """Code of a user/type label, or None if no memory ever had it"""
+        return self._codes[field].get(label)
+
+    def append(self, positions, importance, now: float, user: int = 0, memory_type: int = 0) -> np.ndarray:
+        """Adds rows and returns their ids (user and memory_type are label codes)"""
+        n = len(positions)
+        if self.size + n > len(self.rows):
+            grown = np.zeros(max(2 * len(self.rows), self.size + n), dtype=FIELDS)
+            grown[:self.size] = self.rows[:self.size]
+            self.rows = grown
+
+        ids = np.arange(self.size, self.size + n, dtype="int64")
+        new = self.rows[self.size:self.size + n]
+        new["pos"] = positions
+        new["created_at"] = now
+        new["last_access"] = now
+        new["importance"] = importance
+        new["user"] = user
+        new["type"] = memory_type
+        new["alive"] = True
+        self.size += n
+        self.alive_count += n
+        self._user_ids.setdefault(int(user), array("q")).frombytes(ids.tobytes())
+        return ids
+
+    def remove(self, ids):
+        """Marks rows as removed (ids that are already removed are ignored)"""
+        ids = np.unique(np.asarray(ids, dtype="int64"))
+        ids = ids[self.rows["alive"][ids]]
+        self.rows["alive"][ids] = False
+        self.alive_count -= len(ids)
+        self._dirty.update(ids.tolist())
+
+    def set(self, ids, **values):
+        """Sets fields of rows, e.g. set(ids, last_access=now)"""
+        for name, value in values.items():
+            self.rows[name][ids] = value
+        self._dirty.update(np.atleast_1d(np.asarray(ids, dtype="int64")).tolist())
+
+    def column(self, name: str) -> np.ndarray:
+        return self.rows[name][:self.size]
+
+    def alive_ids(self) -> np.ndarray:
+        return np.flatnonzero(self.column("alive")).astype("int64")
+
+    def is_alive(self, memory_id: int) -> bool:
+        return 0 <= memory_id < self.size and bool(self.rows["alive"][memory_id])
+
+    def user_ids(self, user: int) -> np.ndarray:
+        """Ids of one user's live memories, without reading the other users' rows"""
+        stored = self._user_ids.get(user)
+        if stored is None:
+            return np.zeros(0, dtype="int64")
+
+        ids = np.frombuffer(stored, dtype="int64")
+        live = ids[self.rows["alive"][ids]]
+        if 2 * len(live) < len(ids):
+            # Mostly removed memories: stop carrying them around
+            self._user_ids[user] = array("q", live.tobytes())
+        return live
+
+    def select(self, user: int = None, memory_type: int = None, since: float = None,
+               until: float = None) -> np.ndarray:
+        """
+        Ids of the live memories matching all given filters
+
+        With a user, only that user's ids are filtered, so the cost grows with
+        the user's memories rather than with the whole table.
+        """
+        ids = self.alive_ids() if user is None else self.user_ids(user)
+        if memory_type is not None:
+            ids = ids[self.rows["type"][ids] == memory_type]
+        if since is not None:
+            ids = ids[self.rows["created_at"][ids] >= since]
+        if until is not None:
+            ids = ids[self.rows["created_at"][ids] < until]
+        return ids
+
+    def save(self, path: str):
+        """
+        Writes path.rows (the raw records) and path.labels.json
+
+        Saving back to the path the table was saved to or loaded from only
+        writes the rows changed since (in place) and appends the new ones;
+        the labels are rewritten only when new ones were registered.
+        """
+        rows_path, labels_path = path + ".rows", path + ".labels.json"
+        itemsize = self.rows.dtype.itemsize
+        incremental = (
+            path == self.path and os.path.exists(labels_path)
+            and (os.path.getsize(rows_path) if os.path.exists(rows_path) else -1) == self._saved_size * itemsize
+        )
+
+        if incremental:
+            dirty = np.array(sorted(i for i in self._dirty if i < self._saved_size), dtype="int64")
+            with open(rows_path, "r+b") as f:
+                # One write per run of consecutive ids
+                for run in np.split(dirty, np.flatnonzero(np.diff(dirty) != 1) + 1):
+                    if len(run):
+                        f.seek(int(run[0]) * itemsize)
+                        f.write(self.rows[run[0]:run[-1] + 1].tobytes())
+                f.seek(self._saved_size * itemsize)
+                f.write(self.rows[self._saved_size:self.size].tobytes())
+        else:
+            with open(rows_path + ".tmp", "wb") as f:
+                f.write(self.rows[:self.size].tobytes())
+            os.replace(rows_path + ".tmp", rows_path)
+
+        labels = {field: len(values) for field, values in self.labels.items()}
+        if not incremental or labels != self._saved_labels:
+            with open(labels_path, "w") as f:
+                json.dump(self.labels, f)
+
+        self.path = path
+        self._saved_size = self.size
+        self._saved_labels = labels
+        self._dirty = set()
+
+    @classmethod
+    def load(cls, path: str) -> "MemoryTable":
+        """Loads a table written by save() (or an older path.npy one)"""
+        with open(path + ".labels.json") as f:
+            labels = json.load(f)
+        if not os.path.exists(path + ".rows"):
+            return cls(np.load(path + ".npy"), labels)
+
+        table = cls(np.fromfile(path + ".rows", dtype=FIELDS), labels)
+        table.path = path
+        table._saved_size = table.size
+        table._saved_labels = {field: len(values) for field, values in labels.items()}
+        return table
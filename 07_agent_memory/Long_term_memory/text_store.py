@@ -0,0 +1,140 @@
+import mmap
+import os
+from array import array
+
+import numpy as np
+
+
+class TextStore:
+    """
+    Append-only list of texts kept in one contiguous UTF-8 buffer.
+
+    Text i is data[offsets[i - 1]:offsets[i]], so millions of memories cost
+    their bytes plus 8 bytes each instead of one Python object each.
+
+    On disk it is two files: <path>.bin (the bytes) and <path>.offsets
+    (int64 end offsets). Loading with mmap=True maps both files read-only,
+    so startup does not depend on corpus size and processes share pages.
+    New texts go to an in-memory tail; save() to the same path only appends
+    the tail instead of rewriting the files.
+    """
+
+    def __init__(self, texts=None):
+        self._data = b""                              # Loaded (or mapped) part
+        self._offsets = np.zeros(0, dtype="int64")
+        self._tail = bytearray()                      # Texts added since the last load/save
+        self._tail_offsets = array("q")
+        self._mmap = None
+        self.path = None
+        self.mapped = False
+
+        if texts:
+            self.extend(texts)
+
+    def __len__(self):
+        return len(self._offsets) + len(self._tail_offsets)
+
+    def __getitem__(self, i):
+        n = len(self)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError("text index out of range")
+
+        base = len(self._offsets)
+        if i < base:
+            start = int(self._offsets[i - 1]) if i else 0
+            return bytes(self._data[start:int(self._offsets[i])]).decode("utf-8")
+
+        j = i - base
+        start = self._tail_offsets[j - 1] if j else 0
+        return self._tail[start:self._tail_offsets[j]].decode("utf-8")
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def append(self, text: str):
+        self._tail += text.encode("utf-8")
+        self._tail_offsets.append(len(self._tail))
+
+    def extend(self, texts):
+        for text in texts:
+            self.append(text)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes used by texts and offsets"""
+        return len(self._data) + self._offsets.nbytes + len(self._tail) + 8 * len(self._tail_offsets)
+
+    def save(self, path: str):
+        """
+        Writes <path>.bin and <path>.offsets
+
+        When saving back to the path the store was loaded from, only texts
+        added since then are appended.
+        """
+        data_path, offsets_path = f"{path}.bin", f"{path}.offsets"
+        base_end = int(self._offsets[-1]) if len(self._offsets) else 0
+        incremental = (
+            path == self.path
+            and os.path.exists(data_path) and os.path.getsize(data_path) == base_end
+            and os.path.exists(offsets_path) and os.path.getsize(offsets_path) == self._offsets.nbytes
+        )
+        tail_offsets = np.frombuffer(self._tail_offsets, dtype="int64") + base_end
+
+        if incremental:
+            with open(data_path, "ab") as f:
+                f.write(self._tail)
+            with open(offsets_path, "ab") as f:
+                f.write(tail_offsets.tobytes())
+        else:
+            # Write to temporary files first: the old files may be mapped right now
+            with open(f"{data_path}.tmp", "wb") as f:
+                f.write(self._data[:base_end])
+                f.write(self._tail)
+            with open(f"{offsets_path}.tmp", "wb") as f:
+                f.write(self._offsets.tobytes())
+                f.write(tail_offsets.tobytes())
+            os.replace(f"{data_path}.tmp", data_path)
+            os.replace(f"{offsets_path}.tmp", offsets_path)
+
+        # Re-open so the tail moves into the loaded part
+        self._open(path, mmap_files=self.mapped or self.path is None)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> "TextStore":
+        store = cls()
+        store._open(path, mmap_files=mmap)
+        return store
+
+    def _open(self, path: str, mmap_files: bool):
+        self.close()
+        data_path, offsets_path = f"{path}.bin", f"{path}.offsets"
+
+        if mmap_files and os.path.getsize(data_path):
+            with open(data_path, "rb") as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._data = memoryview(self._mmap)
+        else:
+            with open(data_path, "rb") as f:
+                self._data = f.read()
+
+        if mmap_files and os.path.getsize(offsets_path):
+            self._offsets = np.memmap(offsets_path, dtype="int64", mode="r")
+        else:
+            self._offsets = np.fromfile(offsets_path, dtype="int64")
+
+        self._tail = bytearray()
+        self._tail_offsets = array("q")
+        self.path = path
+        self.mapped = mmap_files
+
+    def close(self):
+        """Releases the memory maps"""
+        if self._mmap is not None:
+            self._data.release()
+            self._mmap.close()
+            self._mmap = None
+        self._data = b""
+        self._offsets = np.zeros(0, dtype="int64")
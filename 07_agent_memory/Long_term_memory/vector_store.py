@@ -1,31 +1,65 @@
-from sentence_transformers import SentenceTransformer
+import os
+
 import faiss
 import numpy as np
 
-model = SentenceTransformer("all-MiniLM-L6-v2")
+from text_store import TextStore
+
+STORE_PATH = "vector_store"
+
+_model = None
+
+
+def get_model():
+    """Loads the embedding model on first use, not at import time"""
+    global _model
+    if _model is None:
+        from sentence_transformers import SentenceTransformer
+        _model = SentenceTransformer("all-MiniLM-L6-v2")
+    return _model
+
+
+def load_or_build(texts):
+    if os.path.exists(f"{STORE_PATH}.faiss"):
+        # 📂 Warm start: memory-map the saved index and texts, nothing is re-encoded
+        index = faiss.read_index(f"{STORE_PATH}.faiss", faiss.IO_FLAG_MMAP_IFC)
+        return index, TextStore.load(STORE_PATH)
 
-memory = [
-    "User likes concise answers",
-    "User prefers Python",
-]
+    memory = TextStore(texts)
 
-embeddings = model.encode(memory)
-embeddings = np.asarray(embeddings).astype("float32")
+    embeddings = get_model().encode(list(memory))
+    embeddings = np.asarray(embeddings).astype("float32")
 
-index = faiss.IndexFlatL2(embeddings.shape[1])
-index.add(embeddings)
+    index = faiss.IndexFlatL2(embeddings.shape[1])
+    index.add(embeddings)
 
-# 🔍 Query
-query = "I like short Python answers"
-query_embedding = model.encode([query])
-query_embedding = np.asarray(query_embedding).astype("float32")
+    # 💾 Save for the next start
+    faiss.write_index(index, f"{STORE_PATH}.faiss")
+    memory.save(STORE_PATH)
+    return index, memory
 
-distances, indices = index.search(query_embedding, k=2)
 
-for idx in indices[0]:
-    print(memory[idx])
+def main():
+    index, memory = load_or_build([
+        "User likes concise answers",
+        "User prefers Python",
+    ])
+
+    # 🔍 Query
+    query = "I like short Python answers"
+    query_embedding = get_model().encode([query])
+    query_embedding = np.asarray(query_embedding).astype("float32")
+
+    distances, indices = index.search(query_embedding, k=2)
+
+    for idx in indices[0]:
+        print(memory[idx])
+
+
+if __name__ == "__main__":
+    main()
 
 
 '''
 retrieve memory by meaning, not keywords.
-'''
\ No newline at end of file
+'''
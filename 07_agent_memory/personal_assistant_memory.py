@@ -1,65 +1,525 @@
-from sentence_transformers import SentenceTransformer
+import json
+import os
+import time
+from itertools import islice
+from typing import Iterable
+
 import faiss
 import numpy as np
 
+from Long_term_memory.lexical_index import LexicalIndex, reciprocal_rank_fusion, search_many
+from Long_term_memory.memory_index import EXACT_SEARCH_BELOW, MemoryIndex, PartitionedIndex
+from Long_term_memory.memory_table import MemoryTable
+from Long_term_memory.text_store import TextStore
+
+EVICTION_POLICIES = ["lru", "age", "importance"]
+
+# Nearest neighbours checked for a merge target (the nearest one may be of another type)
+MERGE_CANDIDATES = 5
+
 
 class PersonalAssistantMemory:
-    def __init__(self, embedding_model_name="all-MiniLM-L6-v2"):
-        # Load embedding model
-        self.model = SentenceTransformer(embedding_model_name)
+    def __init__(self, embedding_model_name="all-MiniLM-L6-v2", index_type="ivf", upgrade_at=50_000,
+                 embedding_cache=None, max_memories=None, eviction_policy="lru", merge_threshold=0.95):
+        """
+        index_type: "flat", "ivf", "hnsw", "ivfpq", or a compressed type:
+        "fp16", "sq8" or "ivfpq_refine" (see create_index). The index starts
+        flat (exact) and is migrated to index_type once it holds upgrade_at memories.
+
+        embedding_cache: EmbeddingCache to reuse embeddings of repeated texts
+        (e.g. one shared between assistants or persisted to disk). None by
+        default: every stored vector already lives in the index, so a cache
+        would hold a second copy of each. A cache of another embedding model
+        raises ValueError.
+
+        max_memories: keep at most this many memories. Once over it, memories
+        are evicted down to 90% of it by eviction_policy: "lru" (least
+        recently recalled), "age" (oldest) or "importance" (least important,
+        then least recently recalled).
 
-        # Memory storage
-        self.memories = []
+        merge_threshold: a new memory this similar (cosine) to an existing one
+        is merged into it instead of stored again (None = never merge).
+
+        Memories can carry a user and a type. Every user gets a separate
+        index partition, so recall for one user never searches the others.
+        """
+        if eviction_policy not in EVICTION_POLICIES:
+            raise ValueError(f"eviction_policy must be one of {EVICTION_POLICIES}")
+
+        # Embedding model, loaded on first encode
+        self.embedding_model_name = embedding_model_name
+        self._model = None
+        self.embedding_cache = embedding_cache
+        if embedding_cache is not None:
+            embedding_cache.bind(embedding_model_name)
+
+        # Memory storage (one contiguous text buffer, list-like) and per-id bookkeeping
+        self.memories = TextStore()
+        self.table = MemoryTable()
 
         # FAISS index (initialized lazily)
+        self.index_type = index_type
+        self.upgrade_at = upgrade_at
         self.index = None
         self.embedding_dim = None
 
-    def add_memory(self, text: str):
+        # BM25 inverted index per user, built on the first hybrid recall
+        self.lexical = {}
+
+        self.max_memories = max_memories
+        self.eviction_policy = eviction_policy
+        self.merge_threshold = merge_threshold
+
+    @property
+    def model(self):
+        """
+        The SentenceTransformer, imported and loaded on first use so that
+        importing this module, starting up (or loading a saved store) doesn't
+        pay for it
+        """
+        if self._model is None:
+            from sentence_transformers import SentenceTransformer
+            self._model = SentenceTransformer(self.embedding_model_name)
+        return self._model
+
+    def encode(self, texts, batch_size: int = 32) -> np.ndarray:
+        """
+        Embeds texts, reusing cached embeddings of texts seen before (with an embedding_cache)
+
+        Embeddings are normalized, so L2 distance d maps to cosine similarity 1 - d / 2.
+        """
+        def encode_fn(missing):
+            return self.model.encode(list(missing), batch_size=batch_size, normalize_embeddings=True)
+
+        if self.embedding_cache is None:
+            return np.asarray(encode_fn(texts)).astype("float32")
+        return self.embedding_cache.encode(texts, encode_fn)
+
+    def __len__(self):
+        """Number of stored (not removed) memories"""
+        return self.table.alive_count
+
+    def get(self, memory_id: int) -> str:
+        if not self.table.is_alive(memory_id):
+            raise KeyError(f"No memory with id {memory_id}")
+        return self.memories[int(self.table.rows["pos"][memory_id])]
+
+    def add_memory(self, text: str, importance: float = 1.0, user: str = None, memory_type: str = None) -> int:
         """
         Stores a memory and updates the vector index
+
+        Returns the memory id (of the existing memory if it was merged).
         """
-        embedding = self.model.encode([text])
-        embedding = np.asarray(embedding).astype("float32")
+        embedding = self.encode([text])
+        memory_id, merged = self._add_embeddings([text], embedding, importance, user, memory_type)[0]
+
+        if merged:
+            print(f"🔁 Memory merged into #{memory_id}: {text}")
+        else:
+            print(f"🧠 Memory added: {text}")
+        return memory_id
+
+    def add_memories(self, texts: Iterable[str], batch_size: int = 256, show_progress: bool = True,
+                     importance: float = 1.0, user: str = None, memory_type: str = None) -> int:
+        """
+        Stores many memories at once (bulk import)
+
+        Texts can be a list or any iterator/generator; they are read, encoded
+        and added to the index one batch at a time, so a huge history never
+        has to be in memory twice.
 
-        # Initialize index on first insert
+        Returns the number of memories added (not counting merged ones).
+        """
+        texts = iter(texts)
+        added = 0
+        start = last_report = time.time()
+
+        while True:
+            batch = list(islice(texts, batch_size))
+            if not batch:
+                break
+
+            embeddings = self.encode(batch, batch_size=batch_size)
+            results = self._add_embeddings(batch, embeddings, importance, user, memory_type)
+            added += sum(not merged for _, merged in results)
+
+            # Progress roughly once a second instead of one line per memory
+            now = time.time()
+            if show_progress and now - last_report >= 1:
+                print(f"📥 {added} memories added ({added / (now - start):.0f}/s)")
+                last_report = now
+
+        if show_progress:
+            elapsed = time.time() - start
+            rate = added / elapsed if elapsed else 0
+            print(f"🧠 {added} memories added in {elapsed:.1f}s ({rate:.0f}/s)")
+
+        return added
+
+    def _add_embeddings(self, texts, embeddings, importance=1.0, user=None, memory_type=None):
+        """
+        Adds a batch of texts and their embeddings (all of one user and type)
+
+        Returns (memory id, merged) for every text.
+        """
+        embeddings = np.asarray(embeddings).astype("float32")
+        self._ensure_index(embeddings.shape[1])
+        now = time.time()
+        user_code = self.table.code("user", user)
+        type_code = self.table.code("type", memory_type)
+        rows = self.table.rows
+
+        # Near-duplicates (same user and type): merge into an existing memory, or into an earlier one in this batch
+        merge_into = [None] * len(texts)
+        if self.merge_threshold is not None:
+            if self.index.ntotal:
+                distances, ids = self.index.search(embeddings, MERGE_CANDIDATES, keys=[user_code])
+                for i, (row_distances, row_ids) in enumerate(zip(distances, ids)):
+                    # Nearest first: merge into the first one of the same type that is similar enough
+                    for distance, memory_id in zip(row_distances, row_ids):
+                        if memory_id == -1 or 1 - distance / 2 < self.merge_threshold:
+                            break
+                        if rows["type"][memory_id] == type_code:
+                            merge_into[i] = int(memory_id)
+                            break
+
+            similarities = embeddings @ embeddings.T
+            for i in range(len(texts)):
+                if merge_into[i] is None:
+                    for j in range(i):
+                        if merge_into[j] is None and similarities[i, j] >= self.merge_threshold:
+                            merge_into[i] = ("batch", j)
+                            break
+
+        new = [i for i in range(len(texts)) if merge_into[i] is None]
+        new_ids = {}
+        if new:
+            positions = np.arange(len(self.memories), len(self.memories) + len(new))
+            self.memories.extend(texts[i] for i in new)
+            ids = self.table.append(positions, importance, now, user_code, type_code)
+            self.index.add(embeddings[new], ids, np.full(len(new), user_code))
+            new_ids = dict(zip(new, ids.tolist()))
+
+            lexical = self.lexical.get(user_code)
+            if lexical is not None:
+                for i in new:
+                    lexical.add(new_ids[i], texts[i])
+
+        results = []
+        rows = self.table.rows
+        for i in range(len(texts)):
+            if i in new_ids:
+                results.append((new_ids[i], False))
+                continue
+
+            target = merge_into[i]
+            memory_id = new_ids[target[1]] if isinstance(target, tuple) else target
+            # A repeat refreshes the memory instead of storing it twice
+            self.table.set(memory_id, last_access=now, importance=max(rows["importance"][memory_id], importance))
+            results.append((memory_id, True))
+
+        self._enforce_capacity()
+        return results
+
+    def _ensure_index(self, dim):
+        # Initialize index on first insert (a memory-mapped partition copies itself into RAM on its first write)
         if self.index is None:
-            self.embedding_dim = embedding.shape[1]
-            self.index = faiss.IndexFlatL2(self.embedding_dim)
+            self.embedding_dim = dim
+            self.index = PartitionedIndex(self.embedding_dim, self.index_type, self.upgrade_at)
+
+    def remove(self, memory_ids) -> int:
+        """
+        Deletes memories by id; returns how many were removed
+        """
+        memory_ids = [int(i) for i in memory_ids if self.table.is_alive(int(i))]
+        if not memory_ids:
+            return 0
+
+        rows = self.table.rows
+        for memory_id in memory_ids:
+            lexical = self.lexical.get(int(rows["user"][memory_id]))
+            if lexical is not None:
+                lexical.remove(memory_id, self.get(memory_id))
+
+        self.index.remove(memory_ids, rows["user"][memory_ids])
+        self.table.remove(memory_ids)
+        self._compact_if_needed()
+        return len(memory_ids)
+
+    def update(self, memory_id: int, text: str, importance: float = None) -> int:
+        """
+        Replaces the text (and embedding) of a memory
+
+        Returns the memory id. That is the same id, except on an hnsw index,
+        which can't replace vectors: there the memory gets a new id.
+        """
+        if not self.table.is_alive(memory_id):
+            raise KeyError(f"No memory with id {memory_id}")
+
+        embedding = self.encode([text])
+        rows = self.table.rows
+        importance = rows["importance"][memory_id] if importance is None else importance
+        user_code = int(rows["user"][memory_id])
+
+        lexical = self.lexical.get(user_code)
+        if lexical is not None:
+            lexical.remove(memory_id, self.get(memory_id))
+
+        self.index.remove([memory_id], [user_code])
+        if memory_id in self.index.partitions[user_code].deleted:
+            self.table.remove([memory_id])
+            memory_id = int(self.table.append([len(self.memories)], importance, time.time(),
+                                              user_code, rows["type"][memory_id])[0])
+        else:
+            self.table.set(memory_id, pos=len(self.memories), importance=importance, last_access=time.time())
 
-        self.index.add(embedding)
         self.memories.append(text)
+        self.index.add(embedding, [memory_id], [user_code])
+        if lexical is not None:
+            lexical.add(memory_id, text)
+        self._compact_if_needed()
+        return memory_id
+
+    def _enforce_capacity(self):
+        """
+        Evicts memories beyond max_memories according to the eviction policy
 
-        print(f"🧠 Memory added: {text}")
+        Evicts down to 90% of max_memories, so the sort over all live
+        memories runs once per many inserts instead of on each one.
+        """
+        if self.max_memories is None or len(self) <= self.max_memories:
+            return
+
+        alive = self.table.alive_ids()
+        excess = len(alive) - int(0.9 * self.max_memories)
+
+        rows = self.table.rows
+        if self.eviction_policy == "lru":
+            order = np.argsort(rows["last_access"][alive], kind="stable")
+        elif self.eviction_policy == "age":
+            order = np.argsort(rows["created_at"][alive], kind="stable")
+        else:
+            order = np.lexsort((rows["last_access"][alive], rows["importance"][alive]))
+
+        self.remove(alive[order[:excess]])
+        print(f"🗑️ Evicted {excess} memories ({self.eviction_policy})")
 
-    def recall(self, query: str, k: int = 3):
+    def _compact_if_needed(self):
+        """
+        Keeps storage bounded: once most stored texts belong to removed
+        memories, the text buffer is rewritten with only the live ones
+        """
+        if len(self.memories) < 1024 or len(self.memories) < 2 * len(self):
+            return
+
+        alive = self.table.alive_ids()
+        rows = self.table.rows
+        compacted = TextStore()
+        compacted.extend(self.memories[int(pos)] for pos in rows["pos"][alive])
+        self.table.set(alive, pos=np.arange(len(alive)))
+        self.memories = compacted
+
+        # hnsw tombstones: rebuild partitions that are mostly tombstones
+        self.index.compact()
+
+    def recall(self, query: str, k: int = 3, user: str = None, memory_type: str = None,
+               since: float = None, until: float = None, hybrid: bool = False):
         """
         Retrieves top-k relevant memories
+
+        user, memory_type and since/until (creation timestamps) restrict the
+        search to matching memories; a user's recall only searches that
+        user's partition. hybrid=True also ranks memories by BM25 keyword
+        match and fuses both rankings.
+        """
+        hits = self.recall_many([query], k, user=user, memory_type=memory_type,
+                                since=since, until=until, hybrid=hybrid)[0]
+        return [text for text, _, _ in hits]
+
+    def recall_many(self, queries, k: int = 3, min_score: float = None, user: str = None,
+                    memory_type: str = None, since: float = None, until: float = None,
+                    hybrid: bool = False):
+        """
+        Recalls memories for several queries with one encode and one index search
+
+        Returns, per query, a ranked list of (text, score, memory id) where
+        score is the cosine similarity to the query. Lists are shorter than k
+        when fewer memories match or score at least min_score. Filters and
+        hybrid work as in recall().
         """
-        if not self.memories:
-            return []
+        queries = list(queries)
+        if not len(self) or not queries:
+            return [[] for _ in queries]
 
-        query_embedding = self.model.encode([query])
-        query_embedding = np.asarray(query_embedding).astype("float32")
+        keys = None
+        if user is not None:
+            keys = [self.table.find_code("user", user)]
+            if keys[0] is None:
+                return [[] for _ in queries]
 
-        distances, indices = self.index.search(query_embedding, k)
+        type_code = None
+        if memory_type is not None:
+            type_code = self.table.find_code("type", memory_type)
+            if type_code is None:
+                return [[] for _ in queries]
+
+        candidates = None
+        if type_code is not None or since is not None or until is not None:
+            # Scoped to a user, this only filters that user's ids
+            candidates = self.table.select(keys[0] if keys else None, type_code, since, until)
+            if not len(candidates):
+                return [[] for _ in queries]
+
+        query_embeddings = self.encode(queries)
+        query_embeddings = np.asarray(query_embeddings).astype("float32")
+
+        # Hybrid: fetch more candidates from both rankings before fusing them
+        fetch = 4 * k if hybrid else k
+        rows = self.table.rows
+
+        if candidates is None:
+            distances, ids = self.index.search(query_embeddings, fetch, keys=keys)
+        elif len(candidates) < EXACT_SEARCH_BELOW:
+            # Few matches: compare against exactly those vectors
+            distances, ids = self.index.search_subset(query_embeddings, fetch, candidates, rows["user"][candidates])
+        else:
+            # Many matches: a hash set of their ids that the index checks while searching
+            selector = faiss.IDSelectorBatch(candidates)
+            distances, ids = self.index.search(query_embeddings, fetch, keys=keys, selector=selector)
+
+        allowed = set(candidates.tolist()) if hybrid and candidates is not None else None
 
         results = []
-        for idx in indices[0]:
-            if idx < len(self.memories):
-                results.append(self.memories[idx])
+        now = time.time()
+        for query, query_embedding, row_distances, row_ids in zip(queries, query_embeddings, distances, ids):
+            # FAISS pads with -1 when fewer than k memories match
+            hits = [(int(memory_id), 1 - float(distance) / 2)
+                    for distance, memory_id in zip(row_distances, row_ids) if memory_id != -1]
+
+            if hybrid:
+                # One BM25 ranking over all searched users, scored with IDF over all of them
+                lexical_hits = search_many([self._lexical_index(key) for key in keys or list(self.index.partitions)],
+                                           query, fetch, allowed)
+                found = reciprocal_rank_fusion([[memory_id for memory_id, _ in hits],
+                                                [memory_id for memory_id, _ in lexical_hits]])[:k]
+
+                # Cosine scores for the fused ones too (keyword-only hits have none yet)
+                found_distances, found_ids = self.index.search_subset(query_embedding[None], len(found),
+                                                                      found, rows["user"][found])
+                scores = {int(memory_id): 1 - float(distance) / 2
+                          for distance, memory_id in zip(found_distances[0], found_ids[0])}
+                hits = [(memory_id, scores[memory_id]) for memory_id in found]
+
+            hits = hits[:k]
+            if min_score is not None:
+                hits = [(memory_id, score) for memory_id, score in hits if score >= min_score]
+
+            self.table.set([memory_id for memory_id, _ in hits], last_access=now)
+            results.append([(self.get(memory_id), score, memory_id) for memory_id, score in hits])
 
         return results
 
+    def _lexical_index(self, user_code: int) -> LexicalIndex:
+        """BM25 index of one user's memories, built on first use"""
+        if user_code not in self.lexical:
+            lexical = LexicalIndex()
+            for memory_id in self.table.user_ids(user_code).tolist():
+                lexical.add(memory_id, self.get(memory_id))
+            self.lexical[user_code] = lexical
+        return self.lexical[user_code]
+
+    def save(self, path: str):
+        """
+        Saves the index and memories to the directory `path`
+
+        Files: index_<user>.faiss (+ .vectors, .ids and .deleted, see
+        MemoryIndex.save) per user partition, texts.bin + texts.offsets (see
+        TextStore), table.rows + table.labels.json (per-memory bookkeeping,
+        see MemoryTable.save) and meta.json. Saving again to the same
+        directory only appends the new texts, table rows and vectors (of
+        partitions that had no removals since) and rewrites the changed rows.
+        """
+        os.makedirs(path, exist_ok=True)
+
+        partitions = self.index.partitions if self.index is not None else {}
+        for key, partition in partitions.items():
+            partition.save(os.path.join(path, f"index_{key}"))
+
+        self.memories.save(os.path.join(path, "texts"))
+        self.table.save(os.path.join(path, "table"))
+
+        with open(os.path.join(path, "meta.json"), "w") as f:
+            json.dump({
+                "embedding_model_name": self.embedding_model_name,
+                "embedding_dim": self.embedding_dim,
+                "index_type": self.index_type,
+                "upgrade_at": self.upgrade_at,
+                "partitions": {key: partition.logged for key, partition in partitions.items()},
+                "count": len(self),
+            }, f)
+
+        print(f"💾 Saved {len(self)} memories to {path}")
+
+    def load(self, path: str, mmap: bool = True):
+        """
+        Loads memories saved with save(), replacing the current ones
+
+        With mmap=True the index vectors and texts are memory-mapped instead
+        of read into RAM: startup takes about the same time for any corpus
+        size and workers on one machine share the same pages. Nothing is
+        re-encoded.
+        """
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+
+        if meta["embedding_model_name"] != self.embedding_model_name:
+            raise ValueError(
+                f"Store was built with {meta['embedding_model_name']}, "
+                f"not {self.embedding_model_name}"
+            )
+
+        self.embedding_dim = meta["embedding_dim"]
+        self.index_type = meta.get("index_type", "flat")
+        self.upgrade_at = meta.get("upgrade_at", self.upgrade_at)
+
+        self.index = None
+        if meta["partitions"]:
+            self.index = PartitionedIndex(self.embedding_dim, self.index_type, self.upgrade_at)
+            for key, logged in meta["partitions"].items():
+                deleted = None
+                if isinstance(logged, list):
+                    # Older stores list each partition's tombstones here (and log sizes separately)
+                    deleted, logged = logged, meta.get("logged", {}).get(key, 0)
+                self.index.partitions[int(key)] = MemoryIndex.load(
+                    os.path.join(path, f"index_{key}"), self.embedding_dim, self.index_type, self.upgrade_at,
+                    deleted=deleted, logged=logged, mmap=mmap)
+        self.memories = TextStore.load(os.path.join(path, "texts"), mmap=mmap)
+        self.table = MemoryTable.load(os.path.join(path, "table"))
+        self.lexical = {}
+
+        print(f"📂 Loaded {len(self)} memories from {path}")
+
 
 # 🧪 Demo usage
 if __name__ == "__main__":
-    assistant = PersonalAssistantMemory()
+    assistant = PersonalAssistantMemory(max_memories=1000)
 
     # Add memories
     assistant.add_memory("User likes concise answers")
-    assistant.add_memory("User prefers Python examples")
+    python_id = assistant.add_memory("User prefers Python examples")
     assistant.add_memory("User works on Agentic AI systems")
+    assistant.add_memory("User likes concise answers!")  # Near-duplicate → merged
+    assistant.add_memory("Meeting with Dana moved to Friday", user="alice", memory_type="event")
+
+    # Bulk import, e.g. from a notes export (any list or generator works)
+    assistant.add_memories([
+        "User is learning about embeddings and vector search",
+        "User dislikes long theoretical explanations",
+        "User's timezone is CET",
+    ])
+
+    # Preferences change
+    assistant.update(python_id, "User prefers Python examples with type hints")
 
     print("\n🔍 Querying memory...\n")
 
@@ -68,3 +528,18 @@ if __name__ == "__main__":
 
     for memory in recalled_memories:
         print(f"- {memory}")
+
+    # Scoped to one user and type; hybrid also matches the exact name
+    print(assistant.recall("When do I see Dana?", k=1, user="alice", memory_type="event", hybrid=True))
+
+    # Several lookups in one go, with similarity scores
+    for question, hits in zip(["language?", "answer style?"],
+                              assistant.recall_many(["language?", "answer style?"], k=2, min_score=0.2)):
+        print(question, [(text, round(score, 2)) for text, score, _ in hits])
+
+    # Persist, then restart from disk without re-encoding anything
+    assistant.save("assistant_memory")
+
+    restored = PersonalAssistantMemory()
+    restored.load("assistant_memory")
+    print(restored.recall(query, k=1))
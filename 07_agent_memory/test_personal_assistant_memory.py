@@ -0,0 +1,262 @@
+"""
+Offline tests for PersonalAssistantMemory
+Uses a fake embedding model, so no model download or network access is needed
+"""
+
+from personal_assistant_memory import PersonalAssistantMemory
+from Long_term_memory.memory_index import INDEX_TYPES
+import numpy as np
+import os
+import re
+import tempfile
+import time
+import zlib
+
+DIM = 256
+
+
+class FakeModel:
+    """
+    Stand-in for the SentenceTransformer: a hashed bag of words.
+
+    Texts sharing words get similar vectors and the same text always gets
+    the same vector, so exact repeats are found at distance 0.
+    """
+
+    def encode(self, texts, batch_size=32, normalize_embeddings=False):
+        vectors = np.zeros((len(texts), DIM), dtype="float32")
+        for row, text in enumerate(texts):
+            for word in re.findall(r"\w+", text.lower()):
+                vectors[row, zlib.crc32(word.encode()) % DIM] += 1
+        if normalize_embeddings:
+            vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-9)
+        return vectors
+
+
+def make_memory(**kwargs):
+    memory = PersonalAssistantMemory(**kwargs)
+    memory._model = FakeModel()
+    return memory
+
+
+def load_memory(path, mmap=True):
+    memory = make_memory()
+    memory.load(path, mmap=mmap)
+    return memory
+
+
+def note(i):
+    """Memory texts that differ in two rare words each"""
+    return f"note{i} about topic{i % 37} and word{i * 7}"
+
+
+def test_add_merge_remove_update():
+    """Test ids, near-duplicate merging, removal and in-place updates."""
+    print("\n" + "="*80)
+    print("TEST 1: Add / Merge / Remove / Update")
+    print("="*80)
+
+    memory = make_memory(index_type="flat")
+    tea = memory.add_memory("User likes green tea", memory_type="preference")
+    python = memory.add_memory("User prefers Python examples", memory_type="preference")
+    assert (tea, python) == (0, 1)
+    assert len(memory) == 2
+
+    # A repeat of the same type is merged, and refreshes the stored importance
+    assert memory.add_memory("User likes green tea", importance=3.0, memory_type="preference") == tea
+    assert len(memory) == 2
+    assert memory.table.rows["importance"][tea] == 3.0
+
+    # The same text as another type is a separate memory...
+    event = memory.add_memory("User likes green tea", memory_type="event")
+    assert event not in (tea, python)
+    # ...and doesn't hide the same-type duplicate right behind it
+    assert memory.add_memory("User likes green tea", memory_type="event") == event
+    assert len(memory) == 3
+
+    # Bulk import merges repeats within the batch too
+    assert memory.add_memories(["User lives in Berlin", "User lives in Berlin", "User owns a cat"],
+                               show_progress=False) == 2
+    assert len(memory) == 5
+
+    assert memory.remove([python, 999]) == 1
+    assert len(memory) == 4
+    assert "User prefers Python examples" not in memory.recall("Python examples", k=5)
+    try:
+        memory.get(python)
+        assert False, "A removed memory can't be read"
+    except KeyError:
+        pass
+
+    assert memory.update(tea, "User likes black coffee") == tea
+    assert memory.get(tea) == "User likes black coffee"
+    assert memory.recall("black coffee", k=1) == ["User likes black coffee"]
+    assert len(memory) == 4
+
+    # hnsw can't replace vectors: the memory moves to a new id
+    graph = make_memory(index_type="hnsw", upgrade_at=0)
+    old = graph.add_memory("User likes green tea")
+    new = graph.update(old, "User likes black coffee")
+    assert new != old
+    assert graph.recall("black coffee", k=1) == ["User likes black coffee"]
+    assert not graph.table.is_alive(old) and len(graph) == 1
+
+    print("\n✅ Add / merge / remove / update test passed!")
+
+
+def test_save_load_round_trips():
+    """Test full saves, incremental saves and mmapped loads for every index type."""
+    print("\n" + "="*80)
+    print("TEST 2: Save / Incremental Save / Load")
+    print("="*80)
+
+    for index_type in INDEX_TYPES:
+        print(f"\n--- {index_type} ---")
+        with tempfile.TemporaryDirectory() as path:
+            memory = make_memory(index_type=index_type, upgrade_at=256, merge_threshold=None)
+            memory.add_memories([note(i) for i in range(400)], user="alice", show_progress=False)
+            assert memory.index.partitions[1].current_type == index_type
+            memory.save(path)
+
+            index_file = os.path.join(path, "index_1.faiss")
+            written = os.stat(index_file).st_mtime_ns
+
+            # A few more memories: appended to the log, the index file is left alone
+            extra = [f"extra{i} zebra{i}" for i in range(10)]
+            memory.add_memories(extra, user="alice", show_progress=False)
+            memory.save(path)
+            assert os.stat(index_file).st_mtime_ns == written
+            assert os.path.getsize(os.path.join(path, "index_1.ids")) == 8 * len(extra)
+
+            for mmap in (True, False):
+                restored = load_memory(path, mmap=mmap)
+                assert len(restored) == 410
+                assert restored.index.partitions[1].mapped == mmap
+                for text in extra[:3]:
+                    assert restored.recall(text, k=1, user="alice") == [text]
+                assert note(5) in restored.recall(note(5), k=5, user="alice")
+
+            # Writing after a load copies the index into RAM; a removal rewrites the index file
+            restored = load_memory(path)
+            restored.add_memory("User likes black coffee", user="alice")
+            assert not restored.index.partitions[1].mapped
+            restored.remove([0])
+            restored.save(path)
+            assert not os.path.exists(os.path.join(path, "index_1.ids"))
+
+            reloaded = load_memory(path)
+            assert len(reloaded) == 410
+            assert not reloaded.table.is_alive(0)
+            assert reloaded.recall("User likes black coffee", k=1, user="alice") == ["User likes black coffee"]
+            assert reloaded.recall(extra[0], k=1, user="alice") == [extra[0]]
+
+    print("\n✅ Save / load round trip test passed!")
+
+
+def test_eviction_low_water_mark():
+    """Test that going over max_memories evicts down to 90% of it, by policy."""
+    print("\n" + "="*80)
+    print("TEST 3: Eviction")
+    print("="*80)
+
+    memory = make_memory(index_type="flat", max_memories=100, eviction_policy="lru", merge_threshold=None)
+    memory.add_memories([note(i) for i in range(100)], show_progress=False)
+    assert len(memory) == 100
+
+    # Recalled memories were used more recently than the rest
+    time.sleep(0.01)
+    for i in range(5):
+        memory.recall(note(i), k=1)
+
+    memory.add_memory("one too many")
+    assert len(memory) == 90
+    alive = set(memory.table.alive_ids().tolist())
+    assert set(range(5)) <= alive, "Recently recalled memories stay"
+    assert not alive & set(range(5, 16)), "The least recently used ones go first"
+    assert 100 in alive
+
+    memory = make_memory(index_type="flat", max_memories=10, eviction_policy="importance", merge_threshold=None)
+    for i in range(11):
+        memory.add_memory(note(i), importance=1.0 if i != 3 else 0.1)
+    assert len(memory) == 9
+    assert not memory.table.is_alive(3), "The least important memory goes first"
+
+    memory = make_memory(index_type="flat", max_memories=10, eviction_policy="age", merge_threshold=None)
+    for i in range(11):
+        memory.add_memory(note(i))
+    assert len(memory) == 9
+    assert set(memory.table.alive_ids().tolist()) == set(range(2, 11)), "The oldest memories go first"
+
+    print("\n✅ Eviction test passed!")
+
+
+def test_per_tenant_filtering():
+    """Test that user, type and time filters only return matching memories."""
+    print("\n" + "="*80)
+    print("TEST 4: Per-Tenant Filtering")
+    print("="*80)
+
+    memory = make_memory(index_type="flat", merge_threshold=None)
+    memory.add_memories(["Alice likes green tea", "Alice works on compilers"], user="alice",
+                        memory_type="preference", show_progress=False)
+    start = time.time()
+    time.sleep(0.01)
+    memory.add_memory("Meeting with Dana moved to Friday", user="alice", memory_type="event")
+    memory.add_memories(["Bob likes green tea", "Bob plays chess"], user="bob", show_progress=False)
+
+    # Each user has a partition of their own
+    assert set(memory.index.partitions) == {1, 2}
+    assert set(memory.recall("green tea", k=5, user="alice")) == {
+        "Alice likes green tea", "Alice works on compilers", "Meeting with Dana moved to Friday"}
+    assert set(memory.recall("green tea", k=5, user="bob")) == {"Bob likes green tea", "Bob plays chess"}
+    assert set(memory.recall("green tea", k=2)) == {"Alice likes green tea", "Bob likes green tea"}
+
+    assert memory.recall("green tea", k=5, user="alice", memory_type="event") == [
+        "Meeting with Dana moved to Friday"]
+    assert memory.recall("green tea", k=5, user="bob", memory_type="event") == []
+    assert set(memory.recall("green tea", k=5, user="alice", since=start)) == {"Meeting with Dana moved to Friday"}
+    assert set(memory.recall("green tea", k=5, user="alice", until=start)) == {
+        "Alice likes green tea", "Alice works on compilers"}
+    assert memory.recall("green tea", k=5, user="carol") == []
+
+    # Hybrid keyword match, scoped and across users
+    assert memory.recall("Dana", k=1, user="alice", hybrid=True) == ["Meeting with Dana moved to Friday"]
+    assert memory.recall("chess", k=1, hybrid=True) == ["Bob plays chess"]
+    assert memory.recall("chess", k=5, user="alice", hybrid=True)[0] != "Bob plays chess"
+
+    # Writing to one user after a load leaves the other users' partitions mapped
+    with tempfile.TemporaryDirectory() as path:
+        memory.save(path)
+        restored = load_memory(path)
+        restored.add_memory("Bob likes jazz", user="bob")
+        assert restored.index.partitions[1].mapped and not restored.index.partitions[2].mapped
+        assert "Bob likes jazz" not in restored.recall("likes jazz", k=5, user="alice")
+        assert restored.recall("likes jazz", k=1, user="bob") == ["Bob likes jazz"]
+
+    print("\n✅ Per-tenant filtering test passed!")
+
+
+def main():
+    """Run all tests."""
+    print("\n" + "="*80)
+    print("PERSONAL ASSISTANT MEMORY - OFFLINE TEST SUITE")
+    print("="*80)
+
+    try:
+        test_add_merge_remove_update()
+        test_save_load_round_trips()
+        test_eviction_low_water_mark()
+        test_per_tenant_filtering()
+
+        print("\n" + "="*80)
+        print("✅ ALL TESTS PASSED!")
+        print("="*80)
+
+    except Exception as e:
+        print(f"\n❌ Test failed with error: {e}")
+        import traceback
+        traceback.print_exc()
+
+
+if __name__ == "__main__":
+    main()
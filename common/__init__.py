@@ -0,0 +1,3 @@
+from common.client_provider import ClientProvider, get_default_provider
+
+__all__ = ["ClientProvider", "get_default_provider"]
@@ -0,0 +1,111 @@
+import os
+import threading
+from typing import Dict, Tuple
+
+import httpx
+from openai import AsyncOpenAI, OpenAI
+
+
+class ClientProvider:
+    """
+    Hands out shared, connection-pooled API clients.
+
+    Every agent that gets its OpenAI client from the same provider reuses the
+    same HTTP keep-alive pool, so warm connections are shared across agents
+    instead of each agent opening its own. Clients are created on first use
+    and cached per API key.
+    """
+
+    def __init__(self, max_connections: int = 100, max_keepalive_connections: int = 20,
+                 keepalive_expiry: float = 30.0, timeout: float = 60.0,
+                 connect_timeout: float = 5.0, max_retries: int = 2):
+        """
+        Initialize the provider.
+
+        Args:
+            max_connections: Maximum open connections per client
+            max_keepalive_connections: Idle connections kept warm per client
+            keepalive_expiry: Seconds an idle connection is kept before closing
+            timeout: Overall request timeout in seconds
+            connect_timeout: Timeout for establishing a connection
+            max_retries: Retries the OpenAI client does on its own
+        """
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.max_retries = max_retries
+
+        self._openai: Dict[str, OpenAI] = {}
+        self._async_openai: Dict[str, AsyncOpenAI] = {}
+        self._search: Dict[Tuple, object] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _resolve_key(api_key: str = None) -> str:
+        api_key = api_key or os.getenv("OPENAI_API_KEY")
+        if not api_key:
+            raise ValueError("OpenAI API key must be provided or set in OPENAI_API_KEY environment variable")
+        return api_key
+
+    def openai(self, api_key: str = None) -> OpenAI:
+        """Return the shared OpenAI client for this API key."""
+        api_key = self._resolve_key(api_key)
+        with self._lock:
+            if api_key not in self._openai:
+                self._openai[api_key] = OpenAI(
+                    api_key=api_key,
+                    max_retries=self.max_retries,
+                    http_client=httpx.Client(limits=self.limits, timeout=self.timeout),
+                )
+            return self._openai[api_key]
+
+    def async_openai(self, api_key: str = None) -> AsyncOpenAI:
+        """
+        Return the shared AsyncOpenAI client for this API key.
+
+        Async connections belong to the event loop they were opened on, so
+        only share this client between agents running in the same loop.
+        """
+        api_key = self._resolve_key(api_key)
+        with self._lock:
+            if api_key not in self._async_openai:
+                self._async_openai[api_key] = AsyncOpenAI(
+                    api_key=api_key,
+                    max_retries=self.max_retries,
+                    http_client=httpx.AsyncClient(limits=self.limits, timeout=self.timeout),
+                )
+            return self._async_openai[api_key]
+
+    def search(self, timeout: float = 10.0):
+        """Return the shared DuckDuckGo client (DDGS) for this timeout."""
+        from duckduckgo_search import DDGS  # Only the research agent needs it
+
+        with self._lock:
+            if timeout not in self._search:
+                self._search[timeout] = DDGS(timeout=timeout)
+            return self._search[timeout]
+
+    def close(self):
+        """Close the synchronous clients and forget all cached clients."""
+        with self._lock:
+            for client in self._openai.values():
+                client.close()
+            self._openai.clear()
+            self._async_openai.clear()
+            self._search.clear()
+
+
+_default_provider = None
+_default_lock = threading.Lock()
+
+
+def get_default_provider() -> ClientProvider:
+    """Return the process-wide provider that agents use when no client is injected."""
+    global _default_provider
+    with _default_lock:
+        if _default_provider is None:
+            _default_provider = ClientProvider()
+        return _default_provider